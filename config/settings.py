@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
 
@@ -82,7 +83,7 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -159,6 +160,47 @@ if IS_DB_AVAIL:
         }
     }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_REDIS_URL,
+    }
+}
+
+if 'test' in sys.argv:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Lifetime of cached anonymous catalog responses, in seconds
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+# Lifetime of the catalog and course version keys, in seconds; must be
+# longer than RESPONSE_CACHE_TIMEOUT
+CACHE_VERSION_TIMEOUT = int(
+    os.getenv('CACHE_VERSION_TIMEOUT', 60 * 60 * 24)
+)
+# Cached purchased course and lesson IDs per user, in seconds
+ENTITLEMENT_CACHE_TIMEOUT = int(
+    os.getenv('ENTITLEMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+)
+# Cached users of authenticated requests, in seconds
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 300))
+# Cached subscribed course IDs per user, in seconds
+SUBSCRIPTION_CACHE_TIMEOUT = int(
+    os.getenv('SUBSCRIPTION_CACHE_TIMEOUT', 60 * 60 * 24)
+)
+# Cached course and lesson prices used by PaymentAPI, in seconds
+PRODUCT_PRICE_CACHE_TIMEOUT = int(
+    os.getenv('PRODUCT_PRICE_CACHE_TIMEOUT', 60)
+)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -234,11 +276,30 @@ SWAGGER_SETTINGS = {
 }
 
 # Stripe integration / configuration
-STRIPE_BASE_URL = 'https://api.stripe.com'
+STRIPE_BASE_URL = os.getenv('STRIPE_BASE_URL', 'https://api.stripe.com')
 
 STRIPE_PUBLISHABLE_KEY = os.environ.get("STRIPE_PUBLISHABLE_KEY")
 STRIPE_SECRET_KEY = os.environ.get("STRIPE_SECRET_KEY")
 STRIPE_WEBHOOK_SECRET = os.environ.get("STRIPE_WEBHOOK_SECRET")
+# Card payment backend: 'payments.gateways.StripeGateway' or the in-process
+# 'payments.gateways.FakeGateway' (offline tests and load tests)
+PAYMENT_GATEWAY = {
+    'BACKEND': os.getenv(
+        'PAYMENT_GATEWAY_BACKEND', 'payments.gateways.StripeGateway'
+    ),
+    'OPTIONS': {
+        'timeout': int(os.getenv('PAYMENT_GATEWAY_TIMEOUT', 10)),
+    },
+}
+# How long PaymentAPI remembers the response of an 'Idempotency-Key'
+IDEMPOTENCY_KEY_TTL = timedelta(
+    hours=int(os.getenv('IDEMPOTENCY_KEY_TTL_HOURS', 24))
+)
+# Confirm payments in a Celery task and answer 202 (Accepted); clients can
+# also ask for it per request with the 'Prefer: respond-async' header
+PAYMENT_ASYNC = os.getenv(
+    'PAYMENT_ASYNC', 'False'
+).lower() in ('true', '1')
 
 # Celery configuration
 CELERY_BROKER_URL = "redis://127.0.0.1:6379/0"
@@ -246,7 +307,8 @@ CELERY_RESULT_BACKEND = "redis://127.0.0.1:6379/0"
 
 CELERY_IMPORTS = (
     "subscribers.tasks",
-    "users.tasks"
+    "users.tasks",
+    "payments.tasks",
 )
 
 CELERY_TIMEZONE = TIME_ZONE
@@ -261,8 +323,53 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'users.tasks.activity_check',
         'schedule': timedelta(days=1),
     },
+    'course-update-notifications': {
+        'task': 'subscribers.tasks.dispatch_due_notifications',
+        'schedule': timedelta(minutes=1),
+    },
+    'course-update-digests': {
+        'task': 'subscribers.tasks.send_course_digests',
+        'schedule': timedelta(
+            hours=int(os.getenv('COURSE_DIGEST_INTERVAL_HOURS', 24))
+        ),
+    },
+    'stripe-events': {
+        'task': 'payments.tasks.process_stripe_events',
+        'schedule': timedelta(seconds=30),
+    },
+    'idempotency-key-cleanup': {
+        'task': 'payments.tasks.purge_idempotency_keys',
+        'schedule': timedelta(hours=1),
+    },
 }
 
+# Users who have not logged in for this long are deactivated daily
+USER_INACTIVITY_PERIOD = timedelta(
+    days=int(os.getenv('USER_INACTIVITY_DAYS', 30))
+)
+# Users deactivated per UPDATE statement by users.tasks.activity_check
+USER_DEACTIVATION_BATCH_SIZE = int(
+    os.getenv('USER_DEACTIVATION_BATCH_SIZE', 1000)
+)
+# A deactivation sweep idle for this long, in seconds, is treated as
+# abandoned: the next one starts over instead of resuming its checkpoint
+USER_DEACTIVATION_CHECKPOINT_TIMEOUT = int(
+    os.getenv('USER_DEACTIVATION_CHECKPOINT_TIMEOUT', 60 * 60)
+)
+# Also deactivate accounts that never logged in, by their creation date
+USER_DEACTIVATION_INCLUDE_NEVER_LOGGED_IN = os.getenv(
+    'USER_DEACTIVATION_INCLUDE_NEVER_LOGGED_IN', 'False'
+).lower() in ('true', '1')
+
+# Course updates made within this window are sent as one notification
+COURSE_NOTIFICATION_DELAY = timedelta(
+    minutes=int(os.getenv('COURSE_NOTIFICATION_DELAY_MINUTES', 240))
+)
+# Recipients sent over one SMTP connection by one task
+COURSE_NOTIFICATION_BATCH_SIZE = int(
+    os.getenv('COURSE_NOTIFICATION_BATCH_SIZE', 500)
+)
+
 # Email settings
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
 EMAIL_HOST = os.getenv('EMAIL_HOST')
@@ -0,0 +1,165 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODIFIED_KEY = 'catalog:last-modified'
+COURSE_VERSION_KEY = 'course:{course_id}:version'
+RESPONSE_KEY = 'response:{version}:{path}'
+HITS_KEY = 'response-cache:hits'
+MISSES_KEY = 'response-cache:misses'
+
+
+def _initial_version():
+    """
+    Return a fresh version number.
+
+    Versions start from the current time instead of 1, so a version key
+    evicted from the cache, or expired after 'CACHE_VERSION_TIMEOUT',
+    never comes back with a value that was already used for older entries.
+    This is what allows the version keys to expire at all.
+    """
+    return time.time_ns()
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), settings.CACHE_VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_catalog_version():
+    """
+    Return the version shared by all catalog list responses.
+    """
+    return _get_version(CATALOG_VERSION_KEY)
+
+
+def get_catalog_state():
+    """
+    Return the catalog version and the time of the last catalog write.
+
+    Both values are read from the cache with one round trip and no
+    database query, so the list views can answer conditional requests
+    cheaply. If the timestamp is missing (e.g. evicted or expired), the
+    current time is stored and returned: clients then revalidate once,
+    which is safe.
+
+    Returns:
+        tuple: The catalog version and its last modification time.
+    """
+    state = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    version = state.get(CATALOG_VERSION_KEY) or get_catalog_version()
+    last_modified = state.get(CATALOG_MODIFIED_KEY)
+    if last_modified is None:
+        cache.add(
+            CATALOG_MODIFIED_KEY, timezone.now(),
+            settings.CACHE_VERSION_TIMEOUT
+        )
+        last_modified = cache.get(CATALOG_MODIFIED_KEY)
+    return version, last_modified
+
+
+def get_course_version(course_id):
+    """
+    Return the version of a single course and its lessons.
+
+    The key is created on first use, so callers should only ask for the
+    version of a course known to exist; otherwise any requested ID would
+    leave a key behind until it expires.
+    """
+    return _get_version(COURSE_VERSION_KEY.format(course_id=course_id))
+
+
+def bump_course_version(*course_ids):
+    """
+    Invalidate the cached responses of the given courses.
+
+    The course versions and the catalog version are incremented, so the
+    keys of every response built from the old data stop being used and the
+    stale entries simply expire; nothing is deleted explicitly. The catalog
+    modification time is set to now.
+
+    Args:
+        *course_ids (int): The IDs of the changed courses.
+    """
+    keys = [
+        COURSE_VERSION_KEY.format(course_id=course_id)
+        for course_id in course_ids
+        if course_id is not None
+    ]
+    for key in keys + [CATALOG_VERSION_KEY]:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(
+                key, _initial_version(), settings.CACHE_VERSION_TIMEOUT
+            )
+    cache.set(
+        CATALOG_MODIFIED_KEY, timezone.now(), settings.CACHE_VERSION_TIMEOUT
+    )
+
+
+def cached_response(request, version, get_response):
+    """
+    Serve an anonymous GET response from the cache.
+
+    Authenticated requests are passed through, since their payload depends
+    on the user. Successful anonymous responses are stored under a key
+    built from 'version' and the full request path.
+
+    Args:
+        request (Request): The HTTP request object.
+        version (int): The version of the data the response is built from.
+        get_response (callable): Builds the response on a cache miss.
+
+    Returns:
+        Response: The cached or freshly built response.
+    """
+    if request.method != 'GET' or request.user.is_authenticated:
+        return get_response()
+
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    key = RESPONSE_KEY.format(version=version, path=path)
+
+    data = cache.get(key)
+    if data is not None:
+        _increment(HITS_KEY)
+        return Response(data)
+
+    _increment(MISSES_KEY)
+    response = get_response()
+    if response.status_code == 200:
+        cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+    return response
+
+
+def get_response_cache_stats():
+    """
+    Return the hit and miss counters of the response cache.
+
+    Returns:
+        dict: The 'hits', 'misses' and 'hit_ratio' values.
+    """
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = counters.get(HITS_KEY, 0)
+    misses = counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
@@ -0,0 +1,112 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from courses.models import Course
+from courses.paginators import CoursesPaginator, CoursesCursorPaginator
+
+
+class Command(BaseCommand):
+    """
+    Benchmark deep-page latency of page-number and keyset pagination.
+
+    For every catalog size the command fills the courses table with
+    synthetic rows, then times fetching the last page with
+    CoursesPaginator ('?page=N') and the same page with
+    CoursesCursorPaginator (a cursor pointing at the same depth). The
+    synthetic rows are rolled back unless '--keep' is given.
+
+    Usage:
+        python manage.py bench_pagination --sizes 1000 10000 100000
+    """
+
+    help = 'Benchmark deep-page latency of page-number and keyset pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[1000, 10000, 100000]
+        )
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        self.factory = APIRequestFactory()
+        self.page_size = options['page_size']
+        self.repeat = options['repeat']
+
+        self.stdout.write(
+            f'{"rows":>10} {"page":>8} {"page number, ms":>16} '
+            f'{"cursor, ms":>12}'
+        )
+        with transaction.atomic():
+            for size in sorted(options['sizes']):
+                self.fill(size)
+                page, offset_ms, cursor_ms = self.measure()
+                self.stdout.write(
+                    f'{size:>10} {page:>8} {offset_ms:>16.2f} '
+                    f'{cursor_ms:>12.2f}'
+                )
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def fill(self, size, batch_size=5000):
+        """
+        Add synthetic courses with distinct 'date_added' values until the
+        table has 'size' rows.
+        """
+        field = Course._meta.get_field('date_added')
+        start = Course.objects.count()
+        base = datetime(2020, 1, 1)
+        field.auto_now_add = False
+        try:
+            for batch_start in range(start, size, batch_size):
+                batch_end = min(batch_start + batch_size, size)
+                Course.objects.bulk_create(
+                    Course(
+                        title=f'Course {index}',
+                        date_added=base + timedelta(seconds=index)
+                    )
+                    for index in range(batch_start, batch_end)
+                )
+        finally:
+            field.auto_now_add = True
+
+    def request(self, params):
+        return Request(self.factory.get('/courses/', params))
+
+    def timed(self, paginator, params):
+        queryset = Course.objects.order_by('-date_added', '-id')
+        started = time.perf_counter()
+        for _ in range(self.repeat):
+            paginator.paginate_queryset(queryset, self.request(params))
+        return (time.perf_counter() - started) * 1000 / self.repeat
+
+    def measure(self):
+        """
+        Return the last page number and the average time of fetching it
+        with each paginator.
+        """
+        offset_paginator = CoursesPaginator()
+        offset_paginator.page_size = self.page_size
+        offset_paginator.max_page_size = self.page_size
+        total = Course.objects.count()
+        last_page = max((total - 1) // self.page_size + 1, 1)
+
+        cursor_paginator = CoursesCursorPaginator()
+        cursor_paginator.max_page_size = self.page_size
+        depth = (last_page - 1) * self.page_size
+        cursor_params = {'page_size': self.page_size}
+        if depth:
+            previous = Course.objects.order_by(
+                '-date_added', '-id'
+            )[depth - 1]
+            cursor_params['cursor'] = cursor_paginator.encode_cursor(previous)
+
+        offset_ms = self.timed(offset_paginator, {'page': last_page})
+        cursor_ms = self.timed(cursor_paginator, cursor_params)
+        return last_page, offset_ms, cursor_ms
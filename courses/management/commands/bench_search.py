@@ -0,0 +1,104 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from courses.models import Course
+from courses.search import search_catalog
+from lessons.models import Lesson
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the catalog full-text search on a synthetic catalog.
+
+    The command generates courses and lessons from a fixed random
+    vocabulary (100 lessons per course by default), then times the indexed
+    search against a plain 'icontains' scan for a set of queries. The
+    synthetic rows are rolled back unless '--keep' is given.
+
+    Usage:
+        python manage.py bench_search --lessons 100000
+    """
+
+    help = 'Benchmark the catalog full-text search on a synthetic catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lessons', type=int, default=100000)
+        parser.add_argument('--lessons-per-course', type=int, default=100)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.vocabulary = [self.word() for _ in range(5000)]
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            self.fill(options['lessons'], options['lessons_per_course'])
+            self.stdout.write(
+                f'Generated {options["lessons"]} lessons in '
+                f'{time.perf_counter() - started:.1f} s'
+            )
+
+            queries = [
+                ' '.join(self.random.sample(self.vocabulary, 1 + index % 2))
+                for index in range(options['queries'])
+            ]
+            self.report('full-text search', queries, self.indexed_search)
+            self.report('icontains scan', queries, self.scan)
+
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def word(self):
+        syllables = ['ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'to', 'vi', 'ze']
+        return ''.join(
+            self.random.choice(syllables)
+            for _ in range(self.random.randint(2, 4))
+        )
+
+    def text(self, length):
+        return ' '.join(self.random.choices(self.vocabulary, k=length))
+
+    def fill(self, lessons, lessons_per_course, batch_size=5000):
+        courses = Course.objects.bulk_create(
+            Course(title=self.text(3), description=self.text(40))
+            for _ in range(max(lessons // lessons_per_course, 1))
+        )
+        for batch_start in range(0, lessons, batch_size):
+            batch_end = min(batch_start + batch_size, lessons)
+            Lesson.objects.bulk_create(
+                Lesson(
+                    title=self.text(4),
+                    description=self.text(60),
+                    course=courses[index % len(courses)],
+                    price=0
+                )
+                for index in range(batch_start, batch_end)
+            )
+
+    @staticmethod
+    def indexed_search(query):
+        results = search_catalog(query)
+        return len(results['courses']) + len(results['lessons'])
+
+    @staticmethod
+    def scan(query):
+        return len(
+            Lesson.objects.filter(description__icontains=query)[:20]
+        )
+
+    def report(self, label, queries, run):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            run(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{label:>18}: median {timings[len(timings) // 2]:.2f} ms, '
+            f'max {timings[-1]:.2f} ms over {len(timings)} queries'
+        )
@@ -0,0 +1,59 @@
+from django.core.management import BaseCommand, CommandError
+
+from courses.services import get_drifted_courses, rebuild_course_counters
+
+
+class Command(BaseCommand):
+    """
+    Check the denormalized course counters for drift and rebuild them.
+
+    The 'lesson_count' and 'subscriber_count' columns of every course are
+    compared with the actual number of lessons and subscribers. Drifted
+    courses are reported and rebuilt from the child tables. With '--check'
+    nothing is written and the command fails if any drift is found.
+
+    Usage:
+        python manage.py sync_course_counters
+        python manage.py sync_course_counters --check
+    """
+
+    help = 'Check course lesson/subscriber counters for drift and rebuild'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report drift, do not rebuild the counters.',
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(get_drifted_courses().values(
+            'pk',
+            'lesson_count',
+            'actual_lesson_count',
+            'subscriber_count',
+            'actual_subscriber_count',
+        ))
+
+        for course in drifted:
+            self.stdout.write(
+                f"Course {course['pk']}: "
+                f"lesson_count {course['lesson_count']} -> "
+                f"{course['actual_lesson_count']}, "
+                f"subscriber_count {course['subscriber_count']} -> "
+                f"{course['actual_subscriber_count']}"
+            )
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('No drift found.'))
+            return
+
+        if options['check']:
+            raise CommandError(f'{len(drifted)} course(s) drifted.')
+
+        updated = rebuild_course_counters(
+            [course['pk'] for course in drifted]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt counters of {updated} course(s).')
+        )
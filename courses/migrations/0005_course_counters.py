@@ -0,0 +1,46 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:16
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_course_counters(apps, schema_editor):
+    Course = apps.get_model('courses', 'Course')
+    Lesson = apps.get_model('lessons', 'Lesson')
+    Subscriber = apps.get_model('subscribers', 'Subscriber')
+
+    lessons = Lesson.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(total=Count('pk')).values('total')
+    subscribers = Subscriber.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(total=Count('pk')).values('total')
+
+    Course.objects.update(
+        lesson_count=Coalesce(Subquery(lessons), 0),
+        subscriber_count=Coalesce(Subquery(subscribers), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_course_date_added_id_idx'),
+        ('lessons', '0009_lesson_lesson_date_added_id_idx'),
+        ('subscribers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='lesson count'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='subscriber_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='subscriber count'),
+        ),
+        migrations.RunPython(fill_course_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+# Generated by Django 4.2.5 on 2026-10-18 12:02
+
+from django.db import migrations
+
+from sevice.search_sql import add_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_counters'),
+    ]
+
+    operations = [
+        add_search_index('courses_course'),
+    ]
@@ -25,6 +25,8 @@ class Course(models.Model):
         auto-generated on creation).
         date_modified (datetime): The date and time when the course was last
         modified (auto-updated).
+        lesson_count (int): The number of lessons in the course.
+        subscriber_count (int): The number of users subscribed to the course.
 
     Methods:
         __str__(): Returns the title of the course as its string
@@ -45,6 +47,9 @@ class Course(models.Model):
         and time upon creation.
         - The 'date_modified' field is automatically updated whenever the
         course is modified.
+        - The 'lesson_count' and 'subscriber_count' fields are denormalized
+        counters maintained incrementally (see courses.services); use the
+        'sync_course_counters' command to check them for drift.
 
     Usage:
         - Use this model to represent courses in your application, storing
@@ -79,6 +84,14 @@ class Course(models.Model):
         auto_now=True,
         verbose_name="date modified"
     )
+    lesson_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="lesson count"
+    )
+    subscriber_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="subscriber count"
+    )
 
     def __str__(self):
         return self.title
@@ -86,3 +99,9 @@ class Course(models.Model):
     class Meta:
         verbose_name = "course"
         verbose_name_plural = "courses"
+        indexes = [
+            models.Index(
+                fields=['date_added', 'id'],
+                name='course_date_added_id_idx'
+            ),
+        ]
@@ -1,5 +1,7 @@
 from rest_framework.pagination import PageNumberPagination
 
+from sevice.paginators import KeysetPagination
+
 
 class CoursesPaginator(PageNumberPagination):
     """
@@ -34,3 +36,22 @@ class CoursesPaginator(PageNumberPagination):
     page_size = 2
     page_size_query_param = 'page_size'
     max_page_size = 10
+
+
+class CoursesCursorPaginator(KeysetPagination):
+    """
+    Keyset paginator for the list of courses.
+
+    Courses are returned newest first and paged on '(date_added, id)',
+    which is backed by a composite index on the Course model.
+
+    Usage:
+        - Requested with '?pagination=cursor' on the courses list; follow
+        the 'next' link to get the following page.
+    """
+
+    page_size = 2
+    page_size_query_param = 'page_size'
+    max_page_size = 10
+    ordering_field = 'date_added'
+    descending = True
@@ -0,0 +1,96 @@
+import re
+
+from django.db import connection
+
+from courses.models import Course
+from lessons.models import Lesson
+
+SEARCH_TABLES = {
+    'courses': (Course._meta.db_table, ('id', 'title')),
+    'lessons': (Lesson._meta.db_table, ('id', 'title', 'course_id')),
+}
+
+POSTGRESQL_SEARCH_SQL = '''
+    SELECT {columns}, ts_rank(search_vector, query) AS rank
+    FROM {table}, websearch_to_tsquery('simple', %s) AS query
+    WHERE search_vector @@ query
+    ORDER BY rank DESC, id
+    LIMIT %s
+'''
+
+SQLITE_SEARCH_SQL = '''
+    SELECT {columns}, -bm25({table}_fts, 2.0, 1.0) AS rank
+    FROM {table}_fts
+    JOIN {table} ON {table}.id = {table}_fts.rowid
+    WHERE {table}_fts MATCH %s
+    ORDER BY rank DESC, {table}.id
+    LIMIT %s
+'''
+
+
+def _fts5_query(query):
+    """
+    Turn free text into an FTS5 query matching all of its words.
+
+    Every word is quoted, so FTS5 operators typed by the user are treated
+    as plain text.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def _search_table(table, columns, query, limit):
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        sql = POSTGRESQL_SEARCH_SQL.format(
+            columns=', '.join(columns), table=table
+        )
+        params = [query, limit]
+    elif vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return []
+        sql = SQLITE_SEARCH_SQL.format(
+            columns=', '.join(f'{table}.{column}' for column in columns),
+            table=table
+        )
+        params = [match, limit]
+    else:
+        sql = f'''
+            SELECT {', '.join(columns)}, 0 AS rank
+            FROM {table}
+            WHERE title LIKE %s OR description LIKE %s
+            ORDER BY id
+            LIMIT %s
+        '''
+        pattern = f'%{query}%'
+        params = [pattern, pattern, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def search_catalog(query, limit=20):
+    """
+    Run a ranked full-text search over courses and lessons.
+
+    On PostgreSQL the search uses the stored 'search_vector' tsvector
+    columns and their GIN indexes; on SQLite it uses the FTS5 tables. Both
+    are kept current by database triggers whenever a title or description
+    is saved (see the '*_search_index' migrations). Titles weigh more than
+    descriptions in the ranking.
+
+    Args:
+        query (str): The text to search for.
+        limit (int): The maximum number of courses and of lessons.
+
+    Returns:
+        dict: 'courses' and 'lessons' lists of matches, best first; every
+        match holds 'id', 'title' and 'rank' (lessons also 'course_id').
+    """
+    return {
+        name: _search_table(table, columns, query, limit)
+        for name, (table, columns) in SEARCH_TABLES.items()
+    }
@@ -3,6 +3,7 @@ from rest_framework import serializers
 from courses.models import Course
 from lessons.serializers import LessonSerializer
 from lessons.validators import UrlValidator
+from subscribers.subscriptions import get_subscribed_course_ids
 
 
 class CoursesSerializer(serializers.ModelSerializer):
@@ -25,6 +26,7 @@ class CoursesSerializer(serializers.ModelSerializer):
         lessons (list): A list of lesson objects serialized using
         LessonSerializer.
         lesson_counter (int): The total number of lessons in the course.
+        subscriber_count (int): The total number of course subscribers.
         is_subscribed (bool): Indicates whether the current user is
         subscribed to the course.
 
@@ -34,13 +36,20 @@ class CoursesSerializer(serializers.ModelSerializer):
         'description' field.
 
     Note:
-        - The 'is_subscribed' field is read-only and is computed based on
-        the relationship between users
-          and courses.
+        - The 'is_subscribed' field is read-only and is computed for the
+        requesting user as a membership test in the set of their subscribed
+        course IDs. The set is taken from the 'subscribed_course_ids'
+        context entry when the view provides one, or else read once per
+        serializer from the cache (see subscribers.subscriptions).
         - The 'lessons' field is read-only and is populated using the
         'lesson_set' relationship on the Course model.
-        - The 'lesson_counter' field is read-only and represents the total
-        number of lessons associated with the course.
+        - The 'lesson_counter' and 'subscriber_count' fields are read-only
+        and are read from the denormalized counters stored on the Course
+        model, so no child table is aggregated on read.
+
+        - When the serializer context holds a 'fields' collection, only
+        those fields are rendered (sparse fieldsets, see
+        CoursesViewSet.get_requested_fields).
 
     Usage:
         - Use this serializer to serialize Course objects to JSON format for
@@ -49,26 +58,41 @@ class CoursesSerializer(serializers.ModelSerializer):
         field is validated using the UrlValidator.
     """
 
-    is_subscribed = serializers.BooleanField(
-        source='subscriber.all.exists',
-        read_only=True
-    )
+    is_subscribed = serializers.SerializerMethodField()
     lessons = LessonSerializer(
         source='lesson_set',
         many=True,
         read_only=True
     )
     lesson_counter = serializers.IntegerField(
-        source='lesson_set.all.count',
+        source='lesson_count',
         read_only=True
     )
+    subscriber_count = serializers.IntegerField(read_only=True)
 
     price = serializers.SerializerMethodField()
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        requested_fields = self.context.get('fields')
+        if requested_fields is not None:
+            for field_name in set(self.fields) - set(requested_fields):
+                self.fields.pop(field_name)
+
     @staticmethod
     def get_price(instance):
         return instance.price // 100
 
+    def get_is_subscribed(self, instance):
+        if 'subscribed_course_ids' not in self.context:
+            request = self.context.get('request')
+            self.context['subscribed_course_ids'] = (
+                set() if request is None
+                else get_subscribed_course_ids(request.user)
+            )
+        return instance.pk in self.context['subscribed_course_ids']
+
     class Meta:
         model = Course
         validators = [UrlValidator(field='description')]
@@ -81,5 +105,6 @@ class CoursesSerializer(serializers.ModelSerializer):
             'lessons',
             'price',
             'lesson_counter',
+            'subscriber_count',
             'is_subscribed'
         )
@@ -0,0 +1,77 @@
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from courses.models import Course
+from lessons.models import Lesson
+from subscribers.models import Subscriber
+
+COURSE_COUNTERS = ('lesson_count', 'subscriber_count')
+
+
+def change_course_counter(course_id, counter, delta):
+    """
+    Atomically add 'delta' to a denormalized counter of a course.
+
+    The update is a single 'UPDATE ... SET counter = counter + delta'
+    statement, so concurrent changes do not overwrite each other. A
+    decrement never takes the counter below zero.
+
+    Args:
+        course_id (int): The ID of the course.
+        counter (str): The counter field, one of COURSE_COUNTERS.
+        delta (int): The value to add to the counter.
+
+    Returns:
+        int: The number of updated rows (0 if the course does not exist).
+    """
+    queryset = Course.objects.filter(pk=course_id)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    return queryset.update(**{counter: F(counter) + delta})
+
+
+def annotate_actual_counters(queryset):
+    """
+    Annotate courses with their counters computed from the child tables.
+
+    Returns:
+        QuerySet: The queryset with 'actual_lesson_count' and
+        'actual_subscriber_count' annotations.
+    """
+    lessons = Lesson.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(total=Count('pk')).values('total')
+    subscribers = Subscriber.objects.filter(
+        course=OuterRef('pk')
+    ).order_by().values('course').annotate(total=Count('pk')).values('total')
+
+    return queryset.annotate(
+        actual_lesson_count=Coalesce(Subquery(lessons), 0),
+        actual_subscriber_count=Coalesce(Subquery(subscribers), 0),
+    )
+
+
+def get_drifted_courses():
+    """
+    Return the courses whose stored counters differ from the actual ones.
+    """
+    return annotate_actual_counters(Course.objects.all()).filter(
+        ~Q(lesson_count=F('actual_lesson_count'))
+        | ~Q(subscriber_count=F('actual_subscriber_count'))
+    ).order_by('pk')
+
+
+def rebuild_course_counters(course_ids):
+    """
+    Recompute the counters of the given courses from the child tables.
+
+    Returns:
+        int: The number of updated courses.
+    """
+    courses = annotate_actual_counters(
+        Course.objects.filter(pk=OuterRef('pk'))
+    )
+    return Course.objects.filter(pk__in=course_ids).update(
+        lesson_count=Subquery(courses.values('actual_lesson_count')),
+        subscriber_count=Subquery(courses.values('actual_subscriber_count')),
+    )
@@ -0,0 +1,675 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from courses.cache import (
+    CATALOG_MODIFIED_KEY,
+    COURSE_VERSION_KEY,
+    bump_course_version,
+)
+from courses.models import Course
+from lessons.models import Lesson
+from subscribers.models import Subscriber
+from users.models import User
+
+
+class CoursesListQueryCountTests(APITestCase):
+    """
+    Query-count benchmark for the courses list endpoint.
+
+    These test cases measure how many queries the courses list costs with
+    10, 100 and 1000 courses in the catalog and check that the cost does
+    not depend on the catalog size or on the page size.
+
+    Attributes:
+        client (APIClient): The client for making API requests.
+        user (User): The user for testing authenticated requests.
+        url (str): The URL of the courses list.
+
+    Methods:
+        test_query_count_is_constant_for_anonymous_user(): Test the list
+        cost for anonymous requests.
+        test_query_count_is_constant_for_authenticated_user(): Test the
+        list cost for authenticated requests.
+        test_is_subscribed_is_scoped_to_request_user(): Test that
+        'is_subscribed' is computed for the requesting user only.
+        test_is_subscribed_follows_subscribe_view(): Test that a
+        subscription is reflected in 'is_subscribed' right away.
+    """
+
+    catalog_sizes = (10, 100, 1000)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.test', password='test'
+        )
+        self.url = reverse('courses:courses-list')
+
+    def _grow_catalog(self, size):
+        """
+        Add courses, each with two lessons, until the catalog has 'size'
+        courses.
+        """
+        missing = size - Course.objects.count()
+        courses = Course.objects.bulk_create(
+            Course(title=f'Course {index}', description='Description')
+            for index in range(missing)
+        )
+        Lesson.objects.bulk_create(
+            Lesson(
+                title=f'Lesson {index}',
+                description='Description',
+                course=course,
+                owner=self.user,
+                price=0
+            )
+            for course in courses
+            for index in range(2)
+        )
+
+    def _measure(self):
+        """
+        Return the number of queries issued by one full page of the list.
+
+        The response cache is cleared first, so the uncached cost is
+        measured.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'page_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        return len(context.captured_queries)
+
+    def _benchmark(self):
+        costs = {}
+        for size in self.catalog_sizes:
+            self._grow_catalog(size)
+            costs[size] = self._measure()
+        return costs
+
+    def test_query_count_is_constant_for_anonymous_user(self):
+        """
+        Test the list cost for anonymous requests.
+
+        The list must run a count query, the page query and one lesson
+        prefetch regardless of the catalog size; its validators are read
+        from the cache.
+        """
+        costs = self._benchmark()
+
+        self.assertEqual(set(costs.values()), {3}, costs)
+
+    def test_query_count_is_constant_for_authenticated_user(self):
+        """
+        Test the list cost for authenticated requests.
+
+        With the cache cleared the subscription set of the user costs one
+        query on top of the anonymous cost; it is then served from the
+        cache and 'is_subscribed' costs nothing per course.
+        """
+        self.client.force_authenticate(user=self.user)
+
+        costs = self._benchmark()
+
+        self.assertEqual(set(costs.values()), {4}, costs)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url, {'page_size': 10, 'page': 2})
+        self.assertEqual(len(context.captured_queries), 3)
+
+    def test_is_subscribed_is_scoped_to_request_user(self):
+        """
+        Test that 'is_subscribed' is computed for the requesting user only.
+
+        A course with a subscription of another user must not be reported
+        as subscribed.
+        """
+        other_user = User.objects.create_user(
+            email='other@test.test', password='test'
+        )
+        course = Course.objects.create(title='Course', description='Text')
+        Subscriber.objects.create(user=other_user, course=course)
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(
+            reverse('courses:courses-detail', args=[course.pk])
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_subscribed'])
+        self.assertEqual(response.data['lesson_counter'], 0)
+
+    def test_is_subscribed_follows_subscribe_view(self):
+        """
+        Test that subscribing through SubscribeView refreshes the cached
+        subscription set of the user.
+        """
+        course = Course.objects.create(title='Course', description='Text')
+        url = reverse('courses:courses-detail', args=[course.pk])
+        self.client.force_authenticate(user=self.user)
+        self.assertFalse(self.client.get(url).data['is_subscribed'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('subscribers:subscribe', args=[course.pk])
+            )
+
+        self.assertTrue(self.client.get(url).data['is_subscribed'])
+
+
+class CoursesCursorPaginationTests(APITestCase):
+    """
+    Test cases for the opt-in keyset pagination of the courses list.
+
+    Methods:
+        test_cursor_walks_every_course_once(): Test following the 'next'
+        links through the whole list.
+        test_invalid_cursor(): Test that a malformed cursor is rejected.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.url = reverse('courses:courses-list')
+        self.courses = [
+            Course.objects.create(title=f'Course {index}')
+            for index in range(5)
+        ]
+
+    def test_cursor_walks_every_course_once(self):
+        """
+        Test following the 'next' links through the whole list.
+
+        Every course must be returned exactly once, newest first, and the
+        response must not contain a total count.
+        """
+        seen = []
+        response = self.client.get(self.url, {'pagination': 'cursor'})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(course['id'] for course in response.data['results'])
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(
+            seen, [course.pk for course in reversed(self.courses)]
+        )
+
+    def test_invalid_cursor(self):
+        """
+        Test that a malformed cursor is rejected with 404 (Not Found).
+        """
+        response = self.client.get(self.url, {'cursor': 'broken'})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CourseCountersTests(TestCase):
+    """
+    Test cases for the denormalized lesson and subscriber counters.
+
+    Methods:
+        test_lesson_count_follows_lessons(): Test that creating, moving and
+        deleting lessons keeps 'lesson_count' in step.
+        test_subscriber_count_follows_subscribe_view(): Test that toggling
+        a subscription keeps 'subscriber_count' in step.
+        test_subscriber_count_follows_cascades(): Test that deleting a
+        user decrements the counters of their subscriptions.
+        test_sync_course_counters(): Test that the management command
+        reports and repairs drift.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@test.test', password='test'
+        )
+        self.course = Course.objects.create(title='Course')
+        self.other_course = Course.objects.create(title='Other course')
+
+    def _create_lesson(self, course):
+        return Lesson.objects.create(
+            title='Lesson', description='Text', course=course, price=0
+        )
+
+    def test_lesson_count_follows_lessons(self):
+        """
+        Test that creating, moving and deleting lessons keeps
+        'lesson_count' in step.
+        """
+        lesson = self._create_lesson(self.course)
+        self._create_lesson(self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 2)
+
+        lesson = Lesson.objects.get(pk=lesson.pk)
+        lesson.course = self.other_course
+        lesson.save()
+        self.course.refresh_from_db()
+        self.other_course.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 1)
+        self.assertEqual(self.other_course.lesson_count, 1)
+
+        lesson.delete()
+        self.other_course.refresh_from_db()
+        self.assertEqual(self.other_course.lesson_count, 0)
+
+    def test_subscriber_count_follows_subscribe_view(self):
+        """
+        Test that toggling a subscription keeps 'subscriber_count' in step.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = reverse('subscribers:subscribe', args=[self.course.pk])
+
+        client.post(url)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.subscriber_count, 1)
+
+        client.post(url)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.subscriber_count, 0)
+
+    def test_subscriber_count_follows_cascades(self):
+        """
+        Test that subscriptions removed by deleting their user decrement
+        'subscriber_count', and that deleting a course is not disturbed.
+        """
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        for course in (self.course, self.other_course):
+            client.post(reverse('subscribers:subscribe', args=[course.pk]))
+
+        self.other_course.delete()
+        self.user.delete()
+
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.subscriber_count, 0)
+
+    def test_sync_course_counters(self):
+        """
+        Test that the management command reports and repairs drift.
+        """
+        self._create_lesson(self.course)
+        Subscriber.objects.create(user=self.user, course=self.course)
+        Course.objects.filter(pk=self.course.pk).update(lesson_count=7)
+
+        with self.assertRaises(CommandError):
+            call_command('sync_course_counters', check=True, stdout=StringIO())
+
+        call_command('sync_course_counters', stdout=StringIO())
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.lesson_count, 1)
+        self.assertEqual(self.course.subscriber_count, 1)
+        call_command('sync_course_counters', check=True, stdout=StringIO())
+
+
+class CoursesResponseCacheTests(APITestCase):
+    """
+    Test cases for the versioned cache of anonymous catalog responses.
+
+    Methods:
+        test_anonymous_list_is_served_from_cache(): Test that a repeated
+        anonymous request runs only the ETag validator query.
+        test_write_bumps_course_version(): Test that a write through the
+        API makes the next read see the new data.
+        test_authenticated_requests_bypass_cache(): Test that per-user
+        responses are not cached.
+        test_cache_stats(): Test the hit ratio counter endpoint.
+        test_unknown_course_creates_no_version(): Test that a 404 leaves
+        no version key behind.
+        test_version_keys_expire(): Test that version keys are written
+        with a finite timeout.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email='user@test.test', password='test'
+        )
+        self.course = Course.objects.create(
+            title='Course', description='Text', owner=self.user
+        )
+        self.list_url = reverse('courses:courses-list')
+        self.detail_url = reverse(
+            'courses:courses-detail', args=[self.course.pk]
+        )
+
+    def test_anonymous_list_is_served_from_cache(self):
+        """
+        Test that a repeated anonymous request runs no query.
+        """
+        first = self.client.get(self.list_url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.list_url)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    def test_write_bumps_course_version(self):
+        """
+        Test that a write through the API makes the next read see the new
+        data.
+        """
+        self.client.get(self.detail_url)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.put(
+            self.detail_url,
+            {'title': 'Renamed', 'description': 'Text'},
+            format='json'
+        )
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['title'], 'Renamed')
+
+    def test_authenticated_requests_bypass_cache(self):
+        """
+        Test that per-user responses are not cached.
+        """
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.list_url)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.list_url)
+
+        self.assertGreater(len(context.captured_queries), 0)
+
+    def test_cache_stats(self):
+        """
+        Test the hit ratio counter endpoint.
+        """
+        self.client.get(self.list_url)
+        self.client.get(self.list_url)
+        admin = User.objects.create_user(
+            email='admin@test.test', password='test', is_staff=True
+        )
+        self.client.force_authenticate(user=admin)
+
+        response = self.client.get(reverse('courses:courses-cache-stats'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hits'], 1)
+        self.assertEqual(response.data['misses'], 1)
+        self.assertEqual(response.data['hit_ratio'], 0.5)
+
+    def test_unknown_course_creates_no_version(self):
+        """
+        Test that anonymous requests for unknown courses answer 404 and do
+        not create version keys.
+        """
+        for course_id in (999, 'abc'):
+            response = self.client.get(
+                reverse('courses:courses-detail', args=[course_id])
+            )
+
+            self.assertEqual(
+                response.status_code, status.HTTP_404_NOT_FOUND
+            )
+            self.assertIsNone(
+                cache.get(COURSE_VERSION_KEY.format(course_id=course_id))
+            )
+
+    @override_settings(CACHE_VERSION_TIMEOUT=60)
+    def test_version_keys_expire(self):
+        """
+        Test that reading and bumping versions never stores a key without
+        a timeout.
+        """
+        with mock.patch('courses.cache.cache', wraps=cache) as wrapped:
+            self.client.get(self.list_url)
+            self.client.get(self.detail_url)
+            bump_course_version(self.course.pk, 999)
+
+        writes = wrapped.add.call_args_list + wrapped.set.call_args_list
+        version_writes = [
+            call for call in writes
+            if call.args[0].endswith(':version')
+            or call.args[0] == CATALOG_MODIFIED_KEY
+        ]
+        self.assertGreaterEqual(len(version_writes), 4)
+        for call in version_writes:
+            self.assertEqual(call.args[2], 60)
+
+
+class CoursesConditionalGetTests(APITestCase):
+    """
+    Test cases for ETag / Last-Modified handling of the courses endpoints.
+
+    Methods:
+        test_if_none_match_returns_not_modified(): Test that a matching
+        ETag gets 304 after a single query.
+        test_if_modified_since_returns_not_modified(): Test that a current
+        Last-Modified date gets 304.
+        test_change_invalidates_etag(): Test that a change to the course
+        produces a new ETag.
+        test_list_if_none_match(): Test conditional requests on the list.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.course = Course.objects.create(title='Course', description='Text')
+        self.url = reverse('courses:courses-detail', args=[self.course.pk])
+
+    def test_if_none_match_returns_not_modified(self):
+        """
+        Test that a matching ETag gets 304 after a single query.
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_not_modified(self):
+        """
+        Test that a current Last-Modified date gets 304.
+        """
+        last_modified = self.client.get(self.url)['Last-Modified']
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_change_invalidates_etag(self):
+        """
+        Test that a change to the course produces a new ETag.
+        """
+        etag = self.client.get(self.url)['ETag']
+        Lesson.objects.create(
+            title='Lesson', description='Text', course=self.course, price=0
+        )
+        self.course.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_list_if_none_match(self):
+        """
+        Test conditional requests on the list: a matching ETag gets 304
+        without a query, and a write through the API changes the ETag.
+        """
+        url = reverse('courses:courses-list')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        user = User.objects.create_user(
+            email='owner@test.test', password='test'
+        )
+        self.client.force_authenticate(user=user)
+        response = self.client.post(
+            url, {'title': 'New', 'description': 'Text'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class CoursesSparseFieldsetTests(APITestCase):
+    """
+    Test cases for '?fields=' and '?expand=' on the courses endpoints.
+
+    Methods:
+        test_fields_limit_payload_and_queries(): Test that only requested
+        fields are rendered, selected and prefetched.
+        test_expand_lessons(): Test that '?expand=lessons' adds the nested
+        lessons to a sparse fieldset.
+        test_default_payload_is_complete(): Test that requests without
+        'fields' render every field.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.course = Course.objects.create(
+            title='Course', description='Long description', price=1000
+        )
+        Lesson.objects.create(
+            title='Lesson', description='Text', course=self.course, price=0
+        )
+        self.url = reverse('courses:courses-list')
+
+    def test_fields_limit_payload_and_queries(self):
+        """
+        Test that only requested fields are rendered, selected and
+        prefetched.
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'fields': 'title,price'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'id': self.course.pk, 'title': 'Course', 'price': 10}]
+        )
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertFalse(
+            any('lessons_lesson' in query for query in queries)
+        )
+        self.assertFalse(
+            any('"description"' in query for query in queries)
+        )
+
+    def test_expand_lessons(self):
+        """
+        Test that '?expand=lessons' adds the nested lessons to a sparse
+        fieldset.
+        """
+        response = self.client.get(
+            self.url, {'fields': 'title', 'expand': 'lessons'}
+        )
+
+        course = response.data['results'][0]
+        self.assertEqual(set(course), {'id', 'title', 'lessons'})
+        self.assertEqual(len(course['lessons']), 1)
+
+    def test_default_payload_is_complete(self):
+        """
+        Test that requests without 'fields' render every field.
+        """
+        response = self.client.get(self.url)
+
+        self.assertIn('lessons', response.data['results'][0])
+        self.assertIn('description', response.data['results'][0])
+
+
+class CatalogSearchTests(APITestCase):
+    """
+    Test cases for the '/courses/search/' full-text search endpoint.
+
+    Methods:
+        test_search_ranks_title_matches_first(): Test that matches in the
+        title rank above matches in the description.
+        test_search_follows_saved_changes(): Test that the index follows
+        updates and deletes.
+        test_search_requires_query(): Test that 'q' is required.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('courses:courses-search')
+        self.title_match = Course.objects.create(
+            title='Python basics', description='Start programming'
+        )
+        self.description_match = Course.objects.create(
+            title='Data analysis', description='Pandas on top of python'
+        )
+        Course.objects.create(title='Drawing', description='Pencils')
+        self.lesson = Lesson.objects.create(
+            title='Python loops',
+            description='For and while',
+            course=self.description_match,
+            price=0
+        )
+
+    def test_search_ranks_title_matches_first(self):
+        """
+        Test that matches in the title rank above matches in the
+        description.
+        """
+        response = self.client.get(self.url, {'q': 'python'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [course['id'] for course in response.data['courses']],
+            [self.title_match.pk, self.description_match.pk]
+        )
+        self.assertEqual(
+            [lesson['id'] for lesson in response.data['lessons']],
+            [self.lesson.pk]
+        )
+        self.assertEqual(
+            response.data['lessons'][0]['course_id'],
+            self.description_match.pk
+        )
+
+    def test_search_follows_saved_changes(self):
+        """
+        Test that the index follows updates and deletes.
+        """
+        self.title_match.title = 'Ruby basics'
+        self.title_match.save()
+        self.lesson.delete()
+
+        response = self.client.get(self.url, {'q': 'python'})
+
+        self.assertEqual(
+            [course['id'] for course in response.data['courses']],
+            [self.description_match.pk]
+        )
+        self.assertEqual(response.data['lessons'], [])
+
+    def test_search_requires_query(self):
+        """
+        Test that 'q' is required.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,14 +1,31 @@
+from functools import partial
+
+from django.db.models import Prefetch
 from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 
+from courses.cache import (
+    bump_course_version,
+    cached_response,
+    get_catalog_state,
+    get_course_version,
+    get_response_cache_stats,
+)
 from courses.models import Course
-from courses.paginators import CoursesPaginator
+from courses.paginators import CoursesPaginator, CoursesCursorPaginator
+from courses.search import search_catalog
 from courses.serializers import CoursesSerializer
+from lessons.models import Lesson
+from sevice.conditional import conditional_response, make_etag
+from sevice.mixins import KeysetPaginationMixin
+from subscribers.subscriptions import get_subscribed_course_ids
 from users.permissions import IsOwnerOrManager
 
 
-class CoursesViewSet(viewsets.ModelViewSet):
+class CoursesViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     A viewset for managing courses.
 
@@ -18,6 +35,8 @@ class CoursesViewSet(viewsets.ModelViewSet):
     Attributes:
         pagination_class (CoursesPaginator): The pagination class to use for
         list views.
+        keyset_pagination_class (CoursesCursorPaginator): The pagination
+        class used when the client requests '?pagination=cursor'.
         serializer_class (CoursesSerializer): The serializer class for courses.
         queryset (QuerySet): The queryset for retrieving courses.
 
@@ -28,40 +47,118 @@ class CoursesViewSet(viewsets.ModelViewSet):
         update: Update a course by ID.
         partial_update: Partially update a course by ID.
         destroy: Delete a course by ID.
+        cache_stats: Return the hit ratio of the response cache.
+        search: Ranked full-text search over courses and lessons.
+        get_queryset: Override to prefetch lessons for read actions and to
+        select only the requested fields.
+        get_serializer_context: Override to pass the requested fields and
+        the subscribed course IDs of the requesting user.
+        get_requested_fields: Parse the sparse fieldset of the request.
         get_permissions: Override to specify permissions for different actions.
         perform_create: Override to set the owner of the course upon creation.
+        perform_update, perform_destroy: Override to invalidate the cached
+        responses of the course.
 
     Permissions:
         - For 'create', 'update', 'partial_update', and 'destroy' actions,
         only the owner or a manager can access.
-        - For 'list' and 'retrieve' actions, no authentication is required (
-        AllowAny).
+        - For 'list', 'retrieve' and 'search' actions, no authentication is
+        required (AllowAny).
         - For other actions, standard DRF permissions apply (IsAuthenticated
         by default).
 
+    Sparse fieldsets:
+        - '?fields=title,price' renders only the listed fields ('id' is
+        always included); unrequested columns are not selected and
+        omitted relations are not prefetched.
+        - '?expand=lessons' adds the nested lessons to a sparse fieldset.
+        - Without 'fields' every field, including lessons, is rendered.
+
+    Caching:
+        - Anonymous 'list' and 'retrieve' responses are cached under keys
+        that include the catalog or course version; every write bumps the
+        version, so stale entries are never served (see courses.cache).
+        - 'list' and 'retrieve' send ETag and Last-Modified headers and
+        answer a matching 'If-None-Match' or 'If-Modified-Since' with 304
+        (Not Modified) without serializing: 'list' reads its validators
+        from the cached catalog state, 'retrieve' after one timestamp
+        query.
+
     """
 
     pagination_class = CoursesPaginator
+    keyset_pagination_class = CoursesCursorPaginator
     serializer_class = CoursesSerializer
     queryset = Course.objects.all()
 
+    expandable_fields = ('lessons',)
+    field_columns = {
+        'id': ('id',),
+        'title': ('title',),
+        'image': ('image',),
+        'description': ('description',),
+        'owner': ('owner',),
+        'price': ('price',),
+        'lesson_counter': ('lesson_count',),
+        'subscriber_count': ('subscriber_count',),
+    }
+
     def list(self, request, *args, **kwargs):
         """
         List all courses.
 
         Returns:
-            Response: A list of all courses serialized using CoursesSerializer.
+            Response: A list of all courses serialized using CoursesSerializer,
+            or 304 (Not Modified) if the client's copy is current.
         """
-        return super().list(request, *args, **kwargs)
+        version, last_modified = get_catalog_state()
+        etag = make_etag(version, request.user.pk, request.get_full_path())
+        return conditional_response(
+            request,
+            partial(
+                cached_response,
+                request,
+                version,
+                partial(super().list, request, *args, **kwargs)
+            ),
+            etag,
+            last_modified
+        )
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve a single course by ID.
 
         Returns:
-            Response: A single course serialized using CoursesSerializer.
+            Response: A single course serialized using CoursesSerializer,
+            or 304 (Not Modified) if the client's copy is current.
         """
-        return super().retrieve(request, *args, **kwargs)
+        try:
+            last_modified = Course.objects.filter(
+                pk=kwargs[self.lookup_field]
+            ).values_list('date_modified', flat=True).first()
+        except (TypeError, ValueError):
+            last_modified = None
+        if last_modified is None:
+            # Unknown course: answer 404 without creating a version key.
+            return super().retrieve(request, *args, **kwargs)
+
+        version = get_course_version(kwargs[self.lookup_field])
+        get_response = partial(
+            cached_response,
+            request,
+            version,
+            partial(super().retrieve, request, *args, **kwargs)
+        )
+        etag = make_etag(
+            version,
+            last_modified,
+            request.user.pk,
+            request.get_full_path()
+        )
+        return conditional_response(
+            request, get_response, etag, last_modified
+        )
 
     def create(self, request, *args, **kwargs):
         """
@@ -117,6 +214,72 @@ class CoursesViewSet(viewsets.ModelViewSet):
         """
         return super().destroy(request, *args, **kwargs)
 
+    def get_queryset(self):
+        """
+        Return the queryset for the current action.
+
+        For 'list' and 'retrieve' the queryset is built as a single query
+        plan: the counters are stored on the Course rows and the lessons
+        are loaded with one prefetch query, so the number of queries does
+        not grow with the page size. The subscription state of the
+        requesting user comes from their cached subscription set (see
+        get_serializer_context).
+
+        Returns:
+            QuerySet: The queryset of courses.
+        """
+        queryset = super().get_queryset()
+        if self.action not in ['list', 'retrieve']:
+            return queryset
+
+        fields = self.get_requested_fields()
+        if fields is not None:
+            columns = {'date_added'}
+            for field_name in fields:
+                columns.update(self.field_columns.get(field_name, ()))
+            queryset = queryset.only(*columns)
+
+        if fields is None or 'lessons' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('lesson_set', queryset=Lesson.objects.order_by('id'))
+            )
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Return the fields requested with '?fields=' and '?expand='.
+
+        Unknown field names are ignored and 'id' is always included.
+
+        Returns:
+            set: The requested field names, or None if the request does not
+            ask for a sparse fieldset.
+        """
+        params = self.request.query_params
+        if 'fields' not in params:
+            return None
+
+        requested = {'id'}
+        requested.update(
+            name.strip() for name in params['fields'].split(',')
+        )
+        requested.update(
+            name.strip() for name in params.get('expand', '').split(',')
+            if name.strip() in self.expandable_fields
+        )
+        return requested & set(self.serializer_class.Meta.fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ['list', 'retrieve']:
+            fields = self.get_requested_fields()
+            context['fields'] = fields
+            if fields is None or 'is_subscribed' in fields:
+                context['subscribed_course_ids'] = get_subscribed_course_ids(
+                    self.request.user
+                )
+        return context
+
     def get_permissions(self):
         """
         Return the permissions that should be used for the current action.
@@ -126,7 +289,7 @@ class CoursesViewSet(viewsets.ModelViewSet):
         """
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [IsOwnerOrManager()]
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'search']:
             return [AllowAny()]
         return super().get_permissions()
 
@@ -144,3 +307,53 @@ class CoursesViewSet(viewsets.ModelViewSet):
         course = serializer.save()
         course.owner = self.request.user
         course.save()
+        bump_course_version(course.pk)
+
+    def perform_update(self, serializer):
+        course = serializer.save()
+        bump_course_version(course.pk)
+
+    def perform_destroy(self, instance):
+        course_id = instance.pk
+        instance.delete()
+        bump_course_version(course_id)
+
+    @action(
+        detail=False,
+        url_path='cache-stats',
+        permission_classes=[IsAdminUser]
+    )
+    def cache_stats(self, request):
+        """
+        Return the hit and miss counters of the response cache.
+
+        Returns:
+            Response: The 'hits', 'misses' and 'hit_ratio' values.
+        """
+        return Response(get_response_cache_stats())
+
+    @action(detail=False)
+    def search(self, request):
+        """
+        Search courses and lessons by title and description.
+
+        Query parameters:
+            q (str): The text to search for (required).
+            limit (int): The maximum number of courses and of lessons
+            (default 20, at most 100).
+
+        Returns:
+            Response: 'courses' and 'lessons' lists of matches ranked best
+            first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        limit = min(max(limit, 1), 100)
+
+        return Response(search_catalog(query, limit))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lessons', '0008_alter_lesson_owner'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['date_added', 'id'], name='lesson_date_added_id_idx'),
+        ),
+    ]
@@ -29,6 +29,8 @@ class Lesson(models.Model):
     Methods:
         __str__(): Returns a string representation of the lesson, which is
         its title.
+        from_db(): Remembers the course the lesson was loaded with, so that
+        moving the lesson to another course can update the course counters.
 
     Usage:
         - Use this model to represent individual lessons in a course within
@@ -73,6 +75,18 @@ class Lesson(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_course_id = instance.__dict__.get('course_id')
+        return instance
+
     class Meta:
         verbose_name = 'lesson'
         verbose_name_plural = 'lessons'
+        indexes = [
+            models.Index(
+                fields=['date_added', 'id'],
+                name='lesson_date_added_id_idx'
+            ),
+        ]
@@ -1,5 +1,7 @@
 from rest_framework.pagination import PageNumberPagination
 
+from sevice.paginators import KeysetPagination
+
 
 class LessonsPaginator(PageNumberPagination):
     """
@@ -34,3 +36,23 @@ class LessonsPaginator(PageNumberPagination):
     page_size = 2
     page_size_query_param = 'page_size'
     max_page_size = 10
+
+
+class LessonsCursorPaginator(KeysetPagination):
+    """
+    Keyset paginator for listing lessons.
+
+    Lessons are returned in creation order and paged on
+    '(date_added, id)', which is backed by a composite index on the Lesson
+    model.
+
+    Usage:
+        - Requested with '?pagination=cursor' on the lessons list; follow
+        the 'next' link to get the following page.
+    """
+
+    page_size = 2
+    page_size_query_param = 'page_size'
+    max_page_size = 10
+    ordering_field = 'date_added'
+    descending = False
@@ -20,6 +20,9 @@ class LessonSerializer(serializers.ModelSerializer):
         fields (tuple): The fields to include in the serialized representation.
         validators (list): A list of validators to apply to the serializer's
         fields.
+        is_unlocked (bool): Whether the requesting user may read the lesson.
+        It is rendered only when the view passes the unlocked lesson IDs in
+        the 'unlocked_lesson_ids' context key.
 
     Usage:
         - Use this serializer to convert Lesson model instances into JSON
@@ -41,11 +44,20 @@ class LessonSerializer(serializers.ModelSerializer):
         ```
     """
     price = serializers.SerializerMethodField()
+    is_unlocked = serializers.SerializerMethodField()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if 'unlocked_lesson_ids' not in self.context:
+            self.fields.pop('is_unlocked')
 
     @staticmethod
     def get_price(instance):
         return instance.price // 100
 
+    def get_is_unlocked(self, instance):
+        return instance.pk in self.context['unlocked_lesson_ids']
+
     class Meta:
         model = Lesson
         fields = (
@@ -55,7 +67,8 @@ class LessonSerializer(serializers.ModelSerializer):
             'price',
             'course',
             'image',
-            'owner'
+            'owner',
+            'is_unlocked'
         )
         validators = [UrlValidator(field='description')]
 
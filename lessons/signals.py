@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from courses.models import Course
+from courses.services import change_course_counter
+from lessons.models import Lesson
+
+
+@receiver(post_save, sender=Lesson)
+def update_lesson_count_on_save(sender, instance, created, **kwargs):
+    """
+    Keep Course.lesson_count in step with created or moved lessons.
+    """
+    loaded_course_id = getattr(instance, '_loaded_course_id', None)
+
+    if created:
+        change_course_counter(instance.course_id, 'lesson_count', 1)
+    elif loaded_course_id and loaded_course_id != instance.course_id:
+        change_course_counter(loaded_course_id, 'lesson_count', -1)
+        change_course_counter(instance.course_id, 'lesson_count', 1)
+
+    instance._loaded_course_id = instance.course_id
+
+
+@receiver(post_delete, sender=Lesson)
+def update_lesson_count_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Decrement Course.lesson_count when a lesson is deleted.
+
+    Lessons removed by the cascade of their own course deletion are
+    skipped: the course row is about to disappear anyway.
+    """
+    if isinstance(origin, Course) and origin.pk == instance.course_id:
+        return
+    change_course_counter(instance.course_id, 'lesson_count', -1)
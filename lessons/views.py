@@ -1,11 +1,25 @@
+from functools import partial
+
 from django.utils import timezone
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
 
+from courses.cache import (
+    bump_course_version,
+    cached_response,
+    get_catalog_state,
+)
 from courses.models import Course
 from lessons.models import Lesson
-from lessons.paginators import LessonsPaginator
+from lessons.paginators import LessonsPaginator, LessonsCursorPaginator
 from lessons.serializers import LessonSerializer, LessonCreateUpdateSerializer
+from payments.entitlements import (
+    get_entitlement_state,
+    get_unlocked_lesson_ids,
+)
+from sevice.conditional import conditional_response, make_etag
+from sevice.mixins import KeysetPaginationMixin
 from subscribers.services import schedule_notification
 from users.permissions import IsOwnerOrManager, IsPayed
 
@@ -45,15 +59,20 @@ class LessonCreateView(generics.CreateAPIView):
 
         lesson.owner = self.request.user
         lesson.save()
+        Course.objects.filter(pk=lesson.course_id).update(
+            date_modified=timezone.now()
+        )
+        bump_course_version(lesson.course_id)
 
 
-class LessonListView(generics.ListAPIView):
+class LessonListView(KeysetPaginationMixin, generics.ListAPIView):
     """
     List all lessons.
 
     This view allows any user, including unauthenticated users, to retrieve
     a list of all lessons.
-    Lessons are paginated using the LessonsPaginator.
+    Lessons are paginated using the LessonsPaginator, or with the keyset
+    LessonsCursorPaginator when the client requests '?pagination=cursor'.
 
     Permissions:
         - No authentication is required to list lessons (AllowAny).
@@ -65,6 +84,19 @@ class LessonListView(generics.ListAPIView):
         - HTTP status: 200 OK
         - Data: A paginated list of lessons serialized using LessonSerializer.
 
+    Entitlements:
+        - Every lesson has an 'is_unlocked' flag telling whether the user
+        has paid for the lesson or for its course; the flags of a page are
+        resolved with one entitlement lookup (see payments.entitlements).
+
+    Caching:
+        - Anonymous responses are cached under the catalog version, which
+        every lesson and course write bumps.
+        - ETag and Last-Modified headers are sent; a matching conditional
+        request gets 304 (Not Modified) without running the serializer.
+        The ETag depends on the user's entitlements, so a purchase changes
+        it.
+
     Usage:
         - Use this view to retrieve a list of all lessons for public or
         authorized access.
@@ -72,9 +104,38 @@ class LessonListView(generics.ListAPIView):
 
     permission_classes = [AllowAny]
     pagination_class = LessonsPaginator
+    keyset_pagination_class = LessonsCursorPaginator
     serializer_class = LessonSerializer
     queryset = Lesson.objects.all().order_by('id')
 
+    def list(self, request, *args, **kwargs):
+        version, last_modified = get_catalog_state()
+        etag = make_etag(
+            version,
+            get_entitlement_state(request.user),
+            request.get_full_path()
+        )
+        return conditional_response(
+            request,
+            partial(
+                cached_response,
+                request,
+                version,
+                partial(super().list, request, *args, **kwargs)
+            ),
+            etag,
+            last_modified
+        )
+
+    def get_serializer(self, *args, **kwargs):
+        if kwargs.get('many'):
+            context = self.get_serializer_context()
+            context['unlocked_lesson_ids'] = get_unlocked_lesson_ids(
+                self.request.user, args[0]
+            )
+            kwargs['context'] = context
+        return super().get_serializer(*args, **kwargs)
+
 
 class LessonRetrieveView(generics.RetrieveAPIView):
     """
@@ -86,7 +147,8 @@ class LessonRetrieveView(generics.RetrieveAPIView):
 
     Permissions:
         - Users must be authenticated to retrieve a lesson (IsAuthenticated).
-        - Users must have paid for access to retrieve a lesson (IsPayed).
+        - Users must have paid for the lesson or for its course to
+        retrieve it (IsPayed).
 
     Request:
         - HTTP method: GET
@@ -96,6 +158,10 @@ class LessonRetrieveView(generics.RetrieveAPIView):
         - HTTP status: 200 OK on successful retrieval.
         - Data: The retrieved lesson serialized using LessonSerializer.
 
+    Caching:
+        - ETag and Last-Modified headers are sent; a matching conditional
+        request gets 304 (Not Modified) without running the serializer.
+
     Usage:
         - Use this view to retrieve individual lessons for authorized users.
     """
@@ -104,6 +170,26 @@ class LessonRetrieveView(generics.RetrieveAPIView):
     serializer_class = LessonSerializer
     queryset = Lesson.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        # get_object() runs the IsPayed object check, so it must come
+        # before a conditional request can be answered with 304.
+        instance = self.get_object()
+
+        def get_response():
+            serializer = self.get_serializer(
+                instance,
+                context={
+                    **self.get_serializer_context(),
+                    'unlocked_lesson_ids': {instance.pk},
+                }
+            )
+            return Response(serializer.data)
+
+        etag = make_etag(instance.date_modified, request.get_full_path())
+        return conditional_response(
+            request, get_response, etag, instance.date_modified
+        )
+
 
 class LessonUpdateView(generics.UpdateAPIView):
     """
@@ -139,14 +225,18 @@ class LessonUpdateView(generics.UpdateAPIView):
     def update(self, request, *args, **kwargs):
         time_now = timezone.now()
         instance = self.get_object()
-        course = Course.objects.filter(pk=instance.course.pk).first()
-
-        course.date_modified = time_now
-        course.save()
+        Course.objects.filter(pk=instance.course_id).update(
+            date_modified=time_now
+        )
 
-        schedule_notification(course, time_now)
+        schedule_notification(instance.course_id, time_now)
         return super().update(request, *args, **kwargs)
 
+    def perform_update(self, serializer):
+        previous_course_id = serializer.instance.course_id
+        lesson = serializer.save()
+        bump_course_version(previous_course_id, lesson.course_id)
+
 
 class LessonDestroyView(generics.DestroyAPIView):
     """
@@ -174,3 +264,11 @@ class LessonDestroyView(generics.DestroyAPIView):
     permission_classes = [IsOwnerOrManager]
     serializer_class = LessonSerializer
     queryset = Lesson.objects.all()
+
+    def perform_destroy(self, instance):
+        course_id = instance.course_id
+        instance.delete()
+        Course.objects.filter(pk=course_id).update(
+            date_modified=timezone.now()
+        )
+        bump_course_version(course_id)
@@ -0,0 +1,129 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from payments.models import Payment
+
+ENTITLEMENTS_KEY = 'entitlements:{user_id}'
+PRODUCT_TYPES = ('course', 'lesson')
+
+
+def _key(user_id):
+    return ENTITLEMENTS_KEY.format(user_id=user_id)
+
+
+def load_entitlements(user_id):
+    """
+    Read the IDs of the courses and lessons a user has paid for.
+
+    Refunded payments are left out.
+
+    Returns:
+        dict: 'course' and 'lesson' sets of IDs.
+    """
+    entitlements = {product_type: set() for product_type in PRODUCT_TYPES}
+    payments = Payment.objects.filter(
+        user_id=user_id, refunded_at__isnull=True
+    ).values_list('course_id', 'lesson_id')
+    for course_id, lesson_id in payments:
+        if course_id is not None:
+            entitlements['course'].add(course_id)
+        if lesson_id is not None:
+            entitlements['lesson'].add(lesson_id)
+    return entitlements
+
+
+def get_entitlements(user_id):
+    """
+    Return the purchased course and lesson IDs of a user.
+
+    The sets are read from the cache; on a miss they are loaded with one
+    query and cached for 'ENTITLEMENT_CACHE_TIMEOUT' seconds.
+
+    Returns:
+        dict: 'course' and 'lesson' sets of IDs.
+    """
+    entitlements = cache.get(_key(user_id))
+    if entitlements is None:
+        entitlements = load_entitlements(user_id)
+        cache.set(
+            _key(user_id), entitlements, settings.ENTITLEMENT_CACHE_TIMEOUT
+        )
+    return entitlements
+
+
+def _can_read(entitlements, obj):
+    product_type = obj._meta.model_name
+    if product_type == 'lesson':
+        return (
+            obj.pk in entitlements['lesson']
+            or obj.course_id in entitlements['course']
+        )
+    if product_type == 'course':
+        return obj.pk in entitlements['course']
+    return False
+
+
+def has_entitlement(user_id, obj):
+    """
+    Check whether a user may read a paid course or lesson.
+
+    A lesson is readable if the user has paid either for the lesson itself
+    or for its course.
+
+    Args:
+        user_id (int): The ID of the user.
+        obj (Course | Lesson): The paid content.
+
+    Returns:
+        bool: True if the user has a payment granting access to the object.
+    """
+    return _can_read(get_entitlements(user_id), obj)
+
+
+def get_unlocked_lesson_ids(user, lessons):
+    """
+    Return the IDs of the lessons a user may read, out of many lessons.
+
+    The entitlements are read once for the whole list. Staff users may
+    read every lesson and anonymous users none.
+
+    Args:
+        user (User): The requesting user.
+        lessons (Iterable[Lesson]): The lessons to check.
+
+    Returns:
+        set: The IDs of the unlocked lessons.
+    """
+    if not user.is_authenticated:
+        return set()
+    if user.is_staff:
+        return {lesson.pk for lesson in lessons}
+
+    entitlements = get_entitlements(user.pk)
+    return {
+        lesson.pk for lesson in lessons if _can_read(entitlements, lesson)
+    }
+
+
+def get_entitlement_state(user):
+    """
+    Return a value that changes whenever the user's entitlements change.
+
+    Used in the validators of responses that depend on what the user has
+    paid for.
+    """
+    if not user.is_authenticated:
+        return None
+    if user.is_staff:
+        return 'staff'
+    entitlements = get_entitlements(user.pk)
+    return tuple(
+        sorted(entitlements[product_type]) for product_type in PRODUCT_TYPES
+    )
+
+
+def invalidate_entitlements(user_id):
+    """
+    Drop the cached entitlements of a user.
+    """
+    cache.delete(_key(user_id))
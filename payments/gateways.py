@@ -0,0 +1,192 @@
+import itertools
+import threading
+import time
+from functools import lru_cache
+
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class PaymentGateway:
+    """
+    Interface of the card payment backends.
+
+    The methods mirror the Stripe PaymentIntent and PaymentMethod calls
+    used by payments.services and return Stripe-shaped dicts. A declined
+    card raises stripe.error.CardError, whatever the backend.
+
+    Usage:
+        - Select the backend with the 'PAYMENT_GATEWAY' setting and get the
+        shared instance with get_gateway().
+    """
+
+    def create_payment_intent(self, amount, currency, payment_method,
+                              idempotency_key=None):
+        raise NotImplementedError
+
+    def confirm_payment_intent(self, payment_intent_id):
+        raise NotImplementedError
+
+    def retrieve_payment_intent(self, payment_intent_id):
+        raise NotImplementedError
+
+    def retrieve_payment_method(self, payment_method_id):
+        raise NotImplementedError
+
+
+class StripeGateway(PaymentGateway):
+    """
+    Payment gateway backed by the Stripe API.
+
+    Requests go through the public 'stripe' resource classes, with the API
+    key passed per request. The HTTP client is installed through the public
+    'stripe.default_http_client' hook: a RequestsClient with a timeout,
+    which keeps one pooled session per thread, so connections to Stripe are
+    reused across requests without sharing a session between threads.
+
+    Attributes:
+        api_key (str): The Stripe secret key.
+        api_base (str): The Stripe API base URL.
+        client (RequestsClient): The HTTP client used by the 'stripe' module.
+    """
+
+    def __init__(self, api_key=None, api_base=None, timeout=10):
+        self.api_key = api_key or settings.STRIPE_SECRET_KEY
+        self.api_base = api_base or settings.STRIPE_BASE_URL
+
+        self.client = stripe.http_client.RequestsClient(timeout=timeout)
+        stripe.default_http_client = self.client
+        stripe.api_base = self.api_base
+
+    def create_payment_intent(self, amount, currency, payment_method,
+                              idempotency_key=None):
+        return stripe.PaymentIntent.create(
+            api_key=self.api_key,
+            idempotency_key=idempotency_key,
+            amount=amount,
+            currency=currency,
+            payment_method=payment_method,
+            payment_method_types=['card'],
+            automatic_payment_methods={'enabled': False}
+        )
+
+    def confirm_payment_intent(self, payment_intent_id):
+        return stripe.PaymentIntent.confirm(
+            payment_intent_id, api_key=self.api_key
+        )
+
+    def retrieve_payment_intent(self, payment_intent_id):
+        return stripe.PaymentIntent.retrieve(
+            payment_intent_id, api_key=self.api_key
+        )
+
+    def retrieve_payment_method(self, payment_method_id):
+        return stripe.PaymentMethod.retrieve(
+            payment_method_id, api_key=self.api_key
+        )
+
+
+class FakeGateway(PaymentGateway):
+    """
+    Deterministic in-process payment gateway for tests and load tests.
+
+    Every call sleeps 'latency' seconds to stand in for a network round
+    trip. Payments succeed unless their amount is listed in
+    'decline_amounts'; the same idempotency key always returns the same
+    PaymentIntent.
+
+    Attributes:
+        latency (float): The delay of every call, in seconds.
+        decline_amounts (set): Amounts whose payments are declined.
+
+    Note:
+        'timeout' is accepted and ignored, so the StripeGateway options of
+        the 'PAYMENT_GATEWAY' setting work with either backend.
+    """
+
+    def __init__(self, latency=0.0, decline_amounts=(), timeout=None):
+        self.latency = latency
+        self.decline_amounts = set(decline_amounts)
+        self.payment_intents = {}
+        self.idempotency_keys = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def create_payment_intent(self, amount, currency, payment_method,
+                              idempotency_key=None):
+        self.wait()
+        with self.lock:
+            if idempotency_key in self.idempotency_keys:
+                return dict(self.idempotency_keys[idempotency_key])
+            payment_intent = {
+                'id': f'pi_fake_{next(self.ids)}',
+                'object': 'payment_intent',
+                'amount': amount,
+                'amount_received': 0,
+                'currency': currency,
+                'payment_method': payment_method,
+                'status': 'requires_confirmation',
+                'last_payment_error': None,
+            }
+            self.payment_intents[payment_intent['id']] = payment_intent
+            if idempotency_key:
+                self.idempotency_keys[idempotency_key] = payment_intent
+            return dict(payment_intent)
+
+    def confirm_payment_intent(self, payment_intent_id):
+        self.wait()
+        with self.lock:
+            payment_intent = self.payment_intents[payment_intent_id]
+            if payment_intent['amount'] in self.decline_amounts:
+                payment_intent['status'] = 'requires_payment_method'
+                payment_intent['last_payment_error'] = {
+                    'code': 'card_declined',
+                    'message': 'Your card was declined.',
+                }
+                raise stripe.error.CardError(
+                    'Your card was declined.', None, 'card_declined'
+                )
+            payment_intent['status'] = 'succeeded'
+            payment_intent['amount_received'] = payment_intent['amount']
+            return dict(payment_intent)
+
+    def retrieve_payment_intent(self, payment_intent_id):
+        self.wait()
+        with self.lock:
+            return dict(self.payment_intents[payment_intent_id])
+
+    def retrieve_payment_method(self, payment_method_id):
+        self.wait()
+        return {
+            'id': payment_method_id,
+            'object': 'payment_method',
+            'type': 'card',
+        }
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """
+    Return the shared instance of the configured payment gateway.
+
+    The backend class and its keyword arguments come from the
+    'PAYMENT_GATEWAY' setting's 'BACKEND' and 'OPTIONS' keys.
+    """
+    config = settings.PAYMENT_GATEWAY
+    backend = import_string(config['BACKEND'])
+    return backend(**config.get('OPTIONS', {}))
+
+
+@receiver(setting_changed)
+def reset_gateway(setting, **kwargs):
+    if setting in (
+        'PAYMENT_GATEWAY', 'STRIPE_SECRET_KEY', 'STRIPE_BASE_URL'
+    ):
+        get_gateway.cache_clear()
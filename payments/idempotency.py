@@ -0,0 +1,118 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from payments.models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+
+# Never stored: the card details the synchronous response echoes back
+UNSTORED_RESPONSE_KEYS = ('card_details',)
+
+
+def request_fingerprint(request):
+    """
+    Hash the parts of a request that an idempotent repeat must match.
+    """
+    digest = hashlib.sha256()
+    for part in (request.method, request.get_full_path()):
+        digest.update(part.encode())
+        digest.update(b'\0')
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def gateway_idempotency_key(user_id, key):
+    """
+    Return the key passed to the payment gateway for a client key.
+
+    Client keys are only unique per user, gateway keys per account.
+    """
+    return f'payment-{user_id}-{key}'
+
+
+def _claim(user, key, fingerprint):
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user, key=key, fingerprint=fingerprint
+            ), True
+    except IntegrityError:
+        return IdempotencyKey.objects.get(user=user, key=key), False
+
+
+def claim_idempotency_key(request, key):
+    """
+    Claim an idempotency key for a request, or find the earlier request.
+
+    A repeat of a completed request costs one lookup. Keys older than
+    'IDEMPOTENCY_KEY_TTL' are discarded and claimed anew.
+
+    Args:
+        request (Request): The HTTP request object.
+        key (str): The value of the 'Idempotency-Key' header.
+
+    Returns:
+        tuple: The IdempotencyKey and None if the request should run, or
+        None and the response to return instead: the stored response, 409
+        (Conflict) while the first request is still running, or 422
+        (Unprocessable Entity) if the key was used for another request.
+    """
+    fingerprint = request_fingerprint(request)
+    record = IdempotencyKey.objects.filter(
+        user=request.user, key=key
+    ).first()
+
+    expired_before = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    if record is not None and record.date_added < expired_before:
+        record.delete()
+        record = None
+
+    if record is None:
+        record, created = _claim(request.user, key, fingerprint)
+        if created:
+            return record, None
+
+    if record.fingerprint != fingerprint:
+        return None, Response(
+            {'error': f'{IDEMPOTENCY_HEADER} was used for another request'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    if record.status_code is None:
+        return None, Response(
+            {'error': f'A request with this {IDEMPOTENCY_HEADER} is '
+                      f'in progress'},
+            status=status.HTTP_409_CONFLICT
+        )
+    return None, Response(
+        record.response,
+        status=record.status_code,
+        headers={'Idempotent-Replayed': 'true'}
+    )
+
+
+def complete_idempotency_key(record, response):
+    """
+    Store the response of the request that claimed the key.
+    """
+    data = response.data
+    if isinstance(data, dict):
+        data = {
+            name: value for name, value in data.items()
+            if name not in UNSTORED_RESPONSE_KEYS
+        }
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status_code=response.status_code,
+        response=data
+    )
+
+
+def release_idempotency_key(record):
+    """
+    Forget a key whose request failed, so the client can retry with it.
+    """
+    IdempotencyKey.objects.filter(pk=record.pk).delete()
@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management import BaseCommand
+
+from payments.gateways import FakeGateway
+from payments.services import stripe_card_payment
+
+
+class Command(BaseCommand):
+    """
+    Load-test the card payment path offline against the fake gateway.
+
+    The command runs '--payments' card payments through
+    stripe_card_payment from '--concurrency' threads, with every gateway
+    call delayed by '--latency-ms' to stand in for the Stripe round trips,
+    and reports the throughput and latency percentiles. No network or
+    database is used.
+
+    Usage:
+        python manage.py bench_payments --payments 500 --concurrency 20
+    """
+
+    help = 'Load-test the card payment path against the fake gateway'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--latency-ms', type=float, default=50)
+
+    def handle(self, *args, **options):
+        gateway = FakeGateway(latency=options['latency_ms'] / 1000)
+        card = {
+            'card_number': '4242424242424242',
+            'expiry_month': '12',
+            'expiry_year': '2099',
+            'cvc': '123',
+        }
+
+        def pay(_):
+            started = time.perf_counter()
+            response = stripe_card_payment(card, 1000, gateway)
+            return time.perf_counter() - started, response['status']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(pay, range(options['payments'])))
+        elapsed = time.perf_counter() - started
+
+        durations = sorted(duration for duration, _ in results)
+        failed = sum(1 for _, status in results if status != 200)
+        self.stdout.write(
+            f'{len(results)} payments ({failed} failed) in {elapsed:.2f} s: '
+            f'{len(results) / elapsed:.0f} payments/s, '
+            f'p50 {durations[len(durations) // 2] * 1000:.0f} ms, '
+            f'p99 {durations[int(len(durations) * 0.99)] * 1000:.0f} ms'
+        )
@@ -0,0 +1,38 @@
+from django.core.management import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from payments.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    """
+    Rebuild the daily revenue rollup tables from the Payment table.
+
+    The rollups are normally kept current as payments are created and
+    deleted; run this command to backfill them for existing payments or to
+    repair them. '--since' limits the rebuild to the days from that date
+    on.
+
+    Usage:
+        python manage.py rebuild_revenue_rollups
+        python manage.py rebuild_revenue_rollups --since 2023-10-01
+    """
+
+    help = 'Rebuild the daily revenue rollup tables from payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='First day to rebuild, ISO date')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = parse_date(options['since'])
+            except ValueError:
+                since = None
+            if since is None:
+                raise CommandError(f'Invalid date: {options["since"]}')
+
+        written = rebuild_rollups(since)
+        for name, count in written.items():
+            self.stdout.write(f'{name}: {count} rows')
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_rename_payed_price_payment_paid_price'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['payment_date', 'id'], name='payment_date_id_idx'),
+        ),
+    ]
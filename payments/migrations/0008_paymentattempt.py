@@ -0,0 +1,38 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lessons', '0010_lesson_search_index'),
+        ('courses', '0006_course_search_index'),
+        ('payments', '0007_payment_payment_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.IntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('payment_intent', models.CharField(blank=True, max_length=255, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('date_added', models.DateTimeField(auto_now_add=True)),
+                ('date_modified', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payment_attempts', to='courses.course')),
+                ('lesson', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='payment_attempts', to='lessons.lesson')),
+                ('payment', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attempt', to='payments.payment')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payment_attempts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'payment attempt',
+                'verbose_name_plural': 'payment attempts',
+            },
+        ),
+    ]
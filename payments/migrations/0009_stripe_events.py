@@ -0,0 +1,33 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_paymentattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=255, unique=True)),
+                ('type', models.CharField(max_length=255)),
+                ('payload', models.JSONField()),
+                ('date_added', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'stripe event',
+                'verbose_name_plural': 'stripe events',
+            },
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='payment_intent',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('lessons', '0010_lesson_search_index'),
+        ('payments', '0010_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentMethodDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('payment_method', models.CharField(choices=[('cash', 'Cash'), ('card', 'Card'), ('transfer_to_account', 'Transfer to account')], max_length=50)),
+            ],
+            options={
+                'verbose_name': 'payment method daily revenue',
+                'verbose_name_plural': 'payment method daily revenue',
+                'unique_together': {('payment_method', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='OwnerDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'owner daily revenue',
+                'verbose_name_plural': 'owner daily revenue',
+                'unique_together': {('owner', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LessonDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='lessons.lesson')),
+            ],
+            options={
+                'verbose_name': 'lesson daily revenue',
+                'verbose_name_plural': 'lesson daily revenue',
+                'unique_together': {('lesson', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailyRevenue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('revenue', models.BigIntegerField(default=0)),
+                ('payment_count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'course daily revenue',
+                'verbose_name_plural': 'course daily revenue',
+                'unique_together': {('course', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.5 on 2026-10-18 12:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0011_revenue_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='payment',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='refunded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('refunded_at__isnull', True)), fields=('user', 'course'), name='payment_user_course_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(condition=models.Q(('refunded_at__isnull', True)), fields=('user', 'lesson'), name='payment_user_lesson_uniq'),
+        ),
+    ]
@@ -25,6 +25,12 @@ class Payment(models.Model):
         paid_price (int): The amount paid for the course or lesson.
         payment_method (str): The type of payment, chosen from predefined
         choices.
+        payment_intent (str): The ID of the Stripe PaymentIntent that paid
+        for it, used to match webhook events (nullable).
+        refunded_at (DateTimeField): When the payment was fully refunded
+        (nullable). Refunded payments are kept for the audit trail, but no
+        longer grant access or count as revenue, and the product can be
+        bought again.
 
     Methods:
         __str__(): Returns a string representation of the payment, including
@@ -72,12 +78,276 @@ class Payment(models.Model):
         choices=PAYMENT_METHODS,
         **NULLABLE
     )
+    payment_intent = models.CharField(
+        max_length=255,
+        unique=True,
+        **NULLABLE
+    )
+    refunded_at = models.DateTimeField(**NULLABLE)
 
     def __str__(self):
         return f'{self.user} - {self.course if self.course else self.lesson}'
 
     class Meta:
-        unique_together = [["user", "course"], ["user", "lesson"]]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'course'],
+                condition=models.Q(refunded_at__isnull=True),
+                name='payment_user_course_uniq'
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'lesson'],
+                condition=models.Q(refunded_at__isnull=True),
+                name='payment_user_lesson_uniq'
+            ),
+        ]
         verbose_name = 'payment'
         verbose_name_plural = 'payments'
         ordering = ('-payment_date',)
+        indexes = [
+            models.Index(
+                fields=['payment_date', 'id'],
+                name='payment_date_id_idx'
+            ),
+        ]
+
+
+class PaymentAttempt(models.Model):
+    """
+    Model representing a payment that is being confirmed in the background.
+
+    An attempt is recorded when PaymentAPI runs in asynchronous mode; the
+    'process_payment_attempt' Celery task confirms it with Stripe and, on
+    success, creates the Payment. Clients poll its status.
+
+    Attributes:
+        user (User): The user who is paying.
+        course (Course): The course being bought (nullable).
+        lesson (Lesson): The lesson being bought (nullable).
+        amount (int): The price to charge.
+        status (str): The processing state, chosen from predefined choices.
+        payment (Payment): The payment created on success (nullable).
+        payment_intent (str): The ID of the Stripe PaymentIntent (nullable).
+        error (str): Why the payment failed (nullable).
+        date_added (DateTimeField): When the attempt was recorded.
+        date_modified (DateTimeField): When the attempt last changed.
+
+    Methods:
+        __str__(): Returns a string representation of the attempt, including
+        the user, the product and the status.
+    """
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    STATUSES = (
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="payment_attempts",
+        on_delete=models.CASCADE
+    )
+    course = models.ForeignKey(
+        Course,
+        related_name="payment_attempts",
+        on_delete=models.CASCADE,
+        **NULLABLE
+    )
+    lesson = models.ForeignKey(
+        Lesson,
+        related_name="payment_attempts",
+        on_delete=models.CASCADE,
+        **NULLABLE
+    )
+    amount = models.IntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=STATUSES,
+        default=STATUS_PENDING
+    )
+    payment = models.OneToOneField(
+        Payment,
+        related_name="attempt",
+        on_delete=models.SET_NULL,
+        **NULLABLE
+    )
+    payment_intent = models.CharField(max_length=255, **NULLABLE)
+    error = models.TextField(**NULLABLE)
+    date_added = models.DateTimeField(auto_now_add=True)
+    date_modified = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        product = self.course if self.course else self.lesson
+        return f'{self.user} - {product} - {self.status}'
+
+    class Meta:
+        verbose_name = 'payment attempt'
+        verbose_name_plural = 'payment attempts'
+
+
+class StripeEvent(models.Model):
+    """
+    Model representing a raw event received from the Stripe webhook.
+
+    Events are only ever inserted, keyed by their Stripe ID, so a
+    redelivered event is dropped by the unique constraint. The
+    'process_stripe_events' task applies them in batches and sets
+    'processed_at'.
+
+    Attributes:
+        event_id (str): The Stripe event ID.
+        type (str): The Stripe event type, e.g. 'payment_intent.succeeded'.
+        payload (dict): The full event as sent by Stripe.
+        date_added (DateTimeField): When the event was received.
+        processed_at (DateTimeField): When the event was applied (nullable).
+    """
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=255)
+    payload = models.JSONField()
+    date_added = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(db_index=True, **NULLABLE)
+
+    def __str__(self):
+        return f'{self.event_id} - {self.type}'
+
+    class Meta:
+        verbose_name = 'stripe event'
+        verbose_name_plural = 'stripe events'
+
+
+class IdempotencyKey(models.Model):
+    """
+    Model representing a client-supplied 'Idempotency-Key' of PaymentAPI.
+
+    The first request with a key stores the key with a fingerprint of the
+    request; its response is stored once the request completes. Repeats of
+    the request get the stored response instead of paying again (see
+    payments.idempotency).
+
+    Attributes:
+        user (User): The user who sent the request.
+        key (str): The client-supplied key.
+        fingerprint (str): A hash of the method, path and body.
+        status_code (int): The stored response status (nullable while the
+        first request is in progress).
+        response (dict): The stored response data (nullable while the first
+        request is in progress).
+        date_added (DateTimeField): When the key was first used.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="idempotency_keys",
+        on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(**NULLABLE)
+    response = models.JSONField(**NULLABLE)
+    date_added = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f'{self.user} - {self.key}'
+
+    class Meta:
+        unique_together = [["user", "key"]]
+        verbose_name = 'idempotency key'
+        verbose_name_plural = 'idempotency keys'
+
+
+class DailyRevenue(models.Model):
+    """
+    Abstract model of a daily revenue rollup row.
+
+    Concrete rollups add the dimension they group payments by and make
+    '(dimension, date)' unique. The rows are kept up to date incrementally
+    as payments are created and deleted, and rebuilt from Payment by the
+    'rebuild_revenue_rollups' command (see payments.rollups).
+
+    Attributes:
+        date (DateField): The day of the payments.
+        revenue (int): The sum of 'paid_price' of the payments.
+        payment_count (int): The number of payments.
+    """
+
+    date = models.DateField()
+    revenue = models.BigIntegerField(default=0)
+    payment_count = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class CourseDailyRevenue(DailyRevenue):
+    """
+    Daily revenue of the payments for a course.
+    """
+
+    course = models.ForeignKey(
+        Course,
+        related_name="daily_revenue",
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = [["course", "date"]]
+        verbose_name = 'course daily revenue'
+        verbose_name_plural = 'course daily revenue'
+
+
+class LessonDailyRevenue(DailyRevenue):
+    """
+    Daily revenue of the payments for a lesson.
+    """
+
+    lesson = models.ForeignKey(
+        Lesson,
+        related_name="daily_revenue",
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = [["lesson", "date"]]
+        verbose_name = 'lesson daily revenue'
+        verbose_name_plural = 'lesson daily revenue'
+
+
+class OwnerDailyRevenue(DailyRevenue):
+    """
+    Daily revenue of the payments for the courses and lessons of an owner.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="daily_revenue",
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        unique_together = [["owner", "date"]]
+        verbose_name = 'owner daily revenue'
+        verbose_name_plural = 'owner daily revenue'
+
+
+class PaymentMethodDailyRevenue(DailyRevenue):
+    """
+    Daily revenue of the payments made with a payment method.
+    """
+
+    payment_method = models.CharField(
+        max_length=50,
+        choices=Payment.PAYMENT_METHODS
+    )
+
+    class Meta:
+        unique_together = [["payment_method", "date"]]
+        verbose_name = 'payment method daily revenue'
+        verbose_name_plural = 'payment method daily revenue'
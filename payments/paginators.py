@@ -0,0 +1,20 @@
+from sevice.paginators import KeysetPagination
+
+
+class PaymentsCursorPaginator(KeysetPagination):
+    """
+    Keyset paginator for the list of payments.
+
+    Payments are returned newest first and paged on '(payment_date, id)',
+    which is backed by a composite index on the Payment model.
+
+    Usage:
+        - Requested with '?pagination=cursor' on the payments list; follow
+        the 'next' link to get the following page.
+    """
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_field = 'payment_date'
+    descending = True
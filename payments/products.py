@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import NotFound
+
+from courses.models import Course
+from lessons.models import Lesson
+
+PRODUCT_MODELS = {
+    'course': Course,
+    'lesson': Lesson,
+}
+PRICE_KEY = 'product:{product_type}:{product_id}:price'
+
+
+def _key(product_type, product_id):
+    return PRICE_KEY.format(product_type=product_type, product_id=product_id)
+
+
+def get_product_model(product_type):
+    """
+    Return the model of a purchasable product type.
+
+    Raises:
+        NotFound: If the product type cannot be bought.
+    """
+    try:
+        return PRODUCT_MODELS[product_type]
+    except KeyError:
+        raise NotFound(f'Unknown product type: {product_type}')
+
+
+def get_product_price(product_type, product_id):
+    """
+    Return the price of a course or a lesson.
+
+    The price is cached for 'PRODUCT_PRICE_CACHE_TIMEOUT' seconds; on a
+    miss only the 'price' column is read. Saving or deleting the product
+    drops the cached price (see payments.signals).
+
+    Raises:
+        NotFound: If the product type or the product does not exist.
+    """
+    model = get_product_model(product_type)
+    key = _key(product_type, product_id)
+
+    price = cache.get(key)
+    if price is None:
+        price = model.objects.filter(
+            pk=product_id
+        ).values_list('price', flat=True).first()
+        if price is None:
+            raise NotFound(f'{product_type.title()} not found')
+        cache.set(key, price, settings.PRODUCT_PRICE_CACHE_TIMEOUT)
+    return price
+
+
+def invalidate_product_price(product):
+    """
+    Drop the cached price of a course or a lesson.
+    """
+    cache.delete(_key(product._meta.model_name, product.pk))
@@ -0,0 +1,135 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from courses.models import Course
+from lessons.models import Lesson
+from payments.models import (
+    CourseDailyRevenue,
+    LessonDailyRevenue,
+    OwnerDailyRevenue,
+    Payment,
+    PaymentMethodDailyRevenue,
+)
+
+# Rollup model -> (dimension field, expression over Payment)
+ROLLUPS = {
+    CourseDailyRevenue: ('course', F('course')),
+    LessonDailyRevenue: ('lesson', F('lesson')),
+    OwnerDailyRevenue: (
+        'owner', Coalesce(F('course__owner'), F('lesson__owner'))
+    ),
+    PaymentMethodDailyRevenue: ('payment_method', F('payment_method')),
+}
+
+
+def _product_owner_id(payment):
+    if payment.course_id:
+        products = Course.objects.filter(pk=payment.course_id)
+    elif payment.lesson_id:
+        products = Lesson.objects.filter(pk=payment.lesson_id)
+    else:
+        return None
+    return products.values_list('owner_id', flat=True).first()
+
+
+def _column(model):
+    return model._meta.get_field(ROLLUPS[model][0]).attname
+
+
+def _dimension_values(payment):
+    return {
+        CourseDailyRevenue: payment.course_id,
+        LessonDailyRevenue: payment.lesson_id,
+        OwnerDailyRevenue: _product_owner_id(payment),
+        PaymentMethodDailyRevenue: payment.payment_method,
+    }
+
+
+def _add(model, lookup, revenue, payment_count):
+    updated = model.objects.filter(**lookup).update(
+        revenue=F('revenue') + revenue,
+        payment_count=F('payment_count') + payment_count
+    )
+    if updated or payment_count < 0:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(
+                revenue=revenue, payment_count=payment_count, **lookup
+            )
+    except IntegrityError:
+        # Created concurrently since the update above
+        _add(model, lookup, revenue, payment_count)
+
+
+def record_payment(payment, sign=1):
+    """
+    Add a payment to the daily revenue rollups, or remove it.
+
+    Every rollup row is changed with a single 'UPDATE ... SET revenue =
+    revenue + %s'; the row of a new day is inserted on first use.
+
+    Args:
+        payment (Payment): The created or deleted payment.
+        sign (int): 1 to add the payment, -1 to remove it.
+    """
+    day = payment.payment_date.date()
+    for model, value in _dimension_values(payment).items():
+        if value is None:
+            continue
+        _add(
+            model,
+            {_column(model): value, 'date': day},
+            sign * payment.paid_price,
+            sign
+        )
+
+
+def rebuild_rollups(since=None):
+    """
+    Rebuild the daily revenue rollups from the Payment table.
+
+    Each rollup is recomputed with one grouped aggregate query and
+    replaced in a single transaction. Refunded payments are left out.
+
+    Args:
+        since (date): Rebuild only the days from this date on; all days
+        if None.
+
+    Returns:
+        dict: The number of rows written per rollup model name.
+    """
+    payments = Payment.objects.filter(refunded_at__isnull=True)
+    if since is not None:
+        payments = payments.filter(payment_date__date__gte=since)
+
+    written = {}
+    with transaction.atomic():
+        for model, (_, expression) in ROLLUPS.items():
+            stale = model.objects.all()
+            if since is not None:
+                stale = stale.filter(date__gte=since)
+            stale.delete()
+
+            rows = payments.annotate(
+                dimension=expression, day=TruncDate('payment_date')
+            ).filter(
+                dimension__isnull=False
+            ).values('dimension', 'day').annotate(
+                total=Sum('paid_price'), count=Count('id')
+            ).order_by()
+            created = model.objects.bulk_create(
+                (
+                    model(
+                        date=row['day'],
+                        revenue=row['total'],
+                        payment_count=row['count'],
+                        **{_column(model): row['dimension']}
+                    )
+                    for row in rows.iterator()
+                ),
+                batch_size=1000
+            )
+            written[model.__name__] = len(created)
+    return written
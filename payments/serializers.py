@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from payments.models import Payment
+from payments.models import Payment, PaymentAttempt
 from payments.validators import (
     check_expiry_month,
     check_expiry_year,
@@ -56,7 +56,8 @@ class PaymentsSerializer(serializers.ModelSerializer):
             'course',
             'lesson',
             'paid_price',
-            'payment_method'
+            'payment_method',
+            'refunded_at'
         )
 
 
@@ -86,3 +87,27 @@ class CardInformationSerializer(serializers.Serializer):
         required=True,
         validators=[check_cvc],
     )
+
+
+class PaymentAttemptSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the PaymentAttempt model.
+
+    Used by the status endpoint that clients poll after PaymentAPI answered
+    202 (Accepted). 'payment' is set once the payment has succeeded and
+    'error' once it has failed.
+    """
+
+    class Meta:
+        model = PaymentAttempt
+        fields = (
+            'id',
+            'status',
+            'course',
+            'lesson',
+            'amount',
+            'payment',
+            'error',
+            'date_added',
+            'date_modified'
+        )
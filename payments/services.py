@@ -1,11 +1,12 @@
-import stripe
 from rest_framework import status
 from stripe.error import StripeError
 
+from payments.gateways import get_gateway
 from payments.models import Payment
 
 
-def stripe_card_payment(data_dict, product_price):
+def stripe_card_payment(data_dict, product_price, gateway=None,
+                        idempotency_key=None):
     try:
         card_details = {
             "type": "card",
@@ -16,26 +17,57 @@ def stripe_card_payment(data_dict, product_price):
                 "cvc": data_dict['cvc'],
             },
         }
+    except Exception as e:
+        return {
+            'error': f"Your card number is incorrect: {e}",
+            'status': status.HTTP_400_BAD_REQUEST,
+            "payment_intent": {"id": "Null"},
+            "payment_confirm": {'status': "Failed"}
+        }
+
+    response = confirm_card_payment(product_price, gateway, idempotency_key)
+    if 'error' not in response:
+        response['card_details'] = card_details
+    return response
+
+
+def confirm_card_payment(product_price, gateway=None, idempotency_key=None,
+                         on_payment_intent=None):
+    """
+    Create and confirm a card PaymentIntent for the price.
+
+    The calls go through the configured payment gateway (see
+    payments.gateways) unless another 'gateway' is given. With an
+    'idempotency_key' a repeated call reuses the PaymentIntent created by
+    the first one instead of charging again. 'on_payment_intent', if
+    given, is called with the PaymentIntent ID once it is created and
+    before it is confirmed, so webhook events about it can be matched.
 
-        payment_intent = stripe.PaymentIntent.create(
+    Returns:
+        dict: 'message', 'status', 'payment_intent' and 'payment_confirm'
+        on a completed round, or 'error' and 'status' if Stripe could not
+        be reached or rejected the request.
+    """
+    gateway = gateway or get_gateway()
+    try:
+        payment_intent = gateway.create_payment_intent(
             amount=product_price,
             currency='rub',
             payment_method="pm_card_visa",
-            payment_method_types=[card_details["type"]],
-            automatic_payment_methods={
-                "enabled": False,
-            },
+            idempotency_key=idempotency_key,
         )
+        if on_payment_intent is not None:
+            on_payment_intent(payment_intent['id'])
 
         try:
-            payment_confirm = stripe.PaymentIntent.confirm(
+            payment_confirm = gateway.confirm_payment_intent(
                 payment_intent['id']
             )
-            payment_intent_modified = stripe.PaymentIntent.retrieve(
+            payment_intent_modified = gateway.retrieve_payment_intent(
                 payment_intent['id']
             )
         except StripeError as e:
-            payment_intent_modified = stripe.PaymentIntent.retrieve(
+            payment_intent_modified = gateway.retrieve_payment_intent(
                 payment_intent['id']
             )
             payment_confirm = {
@@ -51,7 +83,6 @@ def stripe_card_payment(data_dict, product_price):
             response = {
                 'message': "Card Payment Success",
                 'status': status.HTTP_200_OK,
-                "card_details": card_details,
                 "payment_intent": payment_intent_modified,
                 "payment_confirm": payment_confirm
             }
@@ -59,7 +90,6 @@ def stripe_card_payment(data_dict, product_price):
             response = {
                 'message': "Card Payment Failed",
                 'status': status.HTTP_400_BAD_REQUEST,
-                "card_details": card_details,
                 "payment_intent": payment_intent_modified,
                 "payment_confirm": payment_confirm
             }
@@ -73,21 +103,29 @@ def stripe_card_payment(data_dict, product_price):
     return response
 
 
-def save_payment_if_valid(response, payment):
+def save_payment_if_valid(response, payment, gateway=None):
+    """
+    Create the Payment of a successful card payment.
+
+    Returns:
+        Payment: The created payment, or None if the payment failed.
+    """
     if response['payment_confirm'] and response[
         'status'
     ] == status.HTTP_200_OK:
         payment_confirm = response['payment_confirm']
 
-        payment_method = stripe.PaymentMethod.retrieve(
+        payment_method = (gateway or get_gateway()).retrieve_payment_method(
             payment_confirm['payment_method']
         )
 
         payment['paid_price'] = payment_confirm['amount_received']
         payment['payment_method'] = payment_method['type']
+        payment['payment_intent'] = payment_confirm['id']
 
         # TODO: проверка об оплате проверяется на уровне базы
         #       (unique_togather).
         #       Добавить проверку об оплате на уровне Stripe
 
-        Payment.objects.create(**payment)
+        return Payment.objects.create(**payment)
+    return None
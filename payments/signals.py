@@ -0,0 +1,63 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from payments.entitlements import invalidate_entitlements
+from courses.models import Course
+from lessons.models import Lesson
+from payments.models import Payment
+from payments.products import invalidate_product_price
+from payments.rollups import record_payment
+
+
+@receiver(post_save, sender=Payment)
+def update_entitlements_on_save(sender, instance, **kwargs):
+    """
+    Keep the cached entitlements in step with saved payments.
+
+    The cached entitlements of the user are dropped after the transaction
+    commits, so a payment that is rolled back never grants access, and the
+    next request loads them again, including the new payment.
+    """
+    transaction.on_commit(partial(invalidate_entitlements, instance.user_id))
+
+
+@receiver(post_delete, sender=Payment)
+def update_entitlements_on_delete(sender, instance, **kwargs):
+    """
+    Drop the cached entitlements of the user of a deleted payment.
+    """
+    transaction.on_commit(partial(invalidate_entitlements, instance.user_id))
+
+
+@receiver(post_save, sender=Payment)
+def add_payment_to_rollups(sender, instance, created, **kwargs):
+    """
+    Add a new payment to the daily revenue rollups, in its transaction.
+    """
+    if created:
+        record_payment(instance)
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment_from_rollups(sender, instance, **kwargs):
+    """
+    Remove a deleted payment from the daily revenue rollups.
+
+    Refunded payments were already removed when they were refunded.
+    """
+    if instance.refunded_at is None:
+        record_payment(instance, sign=-1)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Lesson)
+def invalidate_price_on_change(sender, instance, **kwargs):
+    """
+    Drop the cached price of a saved or deleted course or lesson.
+    """
+    invalidate_product_price(instance)
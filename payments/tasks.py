@@ -0,0 +1,135 @@
+from functools import partial
+
+from celery import shared_task
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+
+from payments.models import IdempotencyKey, PaymentAttempt, StripeEvent
+from payments.services import confirm_card_payment, save_payment_if_valid
+from payments.webhooks import apply_stripe_events
+
+
+@shared_task
+def process_payment_attempt(attempt_id):
+    """
+    Confirm a pending payment attempt with Stripe and record the result.
+
+    The attempt is claimed with a conditional update, so a task delivered
+    twice does not charge twice. The PaymentIntent ID is stored on the
+    attempt before the intent is confirmed, so Stripe webhook events can
+    settle the attempt while the confirmation is still running. On success
+    the Payment is created and linked to the attempt; otherwise the attempt
+    is marked as failed with the reason. The result is recorded under a
+    row lock and skipped if a webhook has settled the attempt already.
+    """
+    claimed = PaymentAttempt.objects.filter(
+        pk=attempt_id, status=PaymentAttempt.STATUS_PENDING
+    ).update(status=PaymentAttempt.STATUS_PROCESSING)
+    if not claimed:
+        return
+
+    attempt = PaymentAttempt.objects.get(pk=attempt_id)
+    response = confirm_card_payment(
+        attempt.amount,
+        idempotency_key=f'payment-attempt-{attempt.pk}',
+        on_payment_intent=partial(save_payment_intent, attempt_id)
+    )
+
+    with transaction.atomic():
+        attempt = PaymentAttempt.objects.select_for_update().get(
+            pk=attempt_id
+        )
+        if attempt.status == PaymentAttempt.STATUS_PROCESSING:
+            record_payment_result(attempt, response)
+
+
+def save_payment_intent(attempt_id, payment_intent_id):
+    """
+    Store the ID of the PaymentIntent created for an attempt.
+    """
+    PaymentAttempt.objects.filter(pk=attempt_id).update(
+        payment_intent=payment_intent_id
+    )
+
+
+def record_payment_result(attempt, response):
+    """
+    Store the outcome of a gateway response on a processing attempt.
+    """
+    if 'error' in response:
+        attempt.status = PaymentAttempt.STATUS_FAILED
+        attempt.error = response['error']
+        attempt.save()
+        return
+
+    attempt.payment_intent = response['payment_intent']['id']
+    if response['status'] != status.HTTP_200_OK:
+        attempt.status = PaymentAttempt.STATUS_FAILED
+        attempt.error = (
+            response['payment_confirm'].get('message')
+            or response['message']
+        )
+        attempt.save()
+        return
+
+    product = {
+        'user': attempt.user,
+        'course': attempt.course,
+        'lesson': attempt.lesson,
+    }
+    try:
+        with transaction.atomic():
+            attempt.payment = save_payment_if_valid(response, product)
+    except IntegrityError:
+        attempt.status = PaymentAttempt.STATUS_FAILED
+        attempt.error = 'You already bought this product'
+    else:
+        attempt.status = PaymentAttempt.STATUS_SUCCEEDED
+    attempt.save()
+
+
+@shared_task
+def process_stripe_events(batch_size=500):
+    """
+    Apply the stored Stripe webhook events to payments in batches.
+
+    Unprocessed events are claimed with 'SELECT ... FOR UPDATE SKIP
+    LOCKED', so concurrent workers take disjoint batches (see
+    payments.webhooks.apply_stripe_events).
+
+    Returns:
+        int: The number of events processed.
+    """
+    processed = 0
+    while True:
+        with transaction.atomic():
+            events = list(
+                StripeEvent.objects.select_for_update(
+                    skip_locked=True
+                ).filter(
+                    processed_at__isnull=True
+                ).order_by('id')[:batch_size]
+            )
+            if not events:
+                return processed
+            apply_stripe_events(events)
+            StripeEvent.objects.filter(
+                pk__in=[event.pk for event in events]
+            ).update(processed_at=timezone.now())
+        processed += len(events)
+
+
+@shared_task
+def purge_idempotency_keys():
+    """
+    Delete the idempotency keys older than 'IDEMPOTENCY_KEY_TTL'.
+
+    Returns:
+        int: The number of keys deleted.
+    """
+    deleted, _ = IdempotencyKey.objects.filter(
+        date_added__lt=timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    ).delete()
+    return deleted
@@ -1,11 +1,41 @@
+import csv
+import hashlib
+import hmac
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
 from courses.models import Course
+from lessons.models import Lesson
+from payments.entitlements import get_entitlements
+from payments.gateways import FakeGateway, get_gateway
+from payments.models import (
+    CourseDailyRevenue,
+    IdempotencyKey,
+    OwnerDailyRevenue,
+    Payment,
+    PaymentAttempt,
+    PaymentMethodDailyRevenue,
+    StripeEvent,
+)
+from payments.products import get_product_price
+from payments.rollups import rebuild_rollups
+from payments.tasks import process_payment_attempt, process_stripe_events
 from users.models import User
 
 
+@override_settings(
+    PAYMENT_GATEWAY={'BACKEND': 'payments.gateways.FakeGateway'}
+)
 class PaymentAPITests(APITestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -26,18 +56,94 @@ class PaymentAPITests(APITestCase):
             "payment_method": "card",
             "card_number": "4242424242424242",
             "expiry_month": "12",
-            "expiry_year": "2025",
+            "expiry_year": "2099",
             "cvc": "123",
             "email": "test@gmail.com"
         }
 
     def test_make_payment(self):
-        self.client.force_login(user=self.user)
+        self.client.force_authenticate(user=self.user)
         response = self.client.post(
             self.payment_url, self.card_data, format='json'
         )
-        print(response.json())
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], "Card Payment Success")
+        self.assertTrue(
+            Payment.objects.filter(
+                user=self.user, course=self.course
+            ).exists()
+        )
+
+    @override_settings(PAYMENT_GATEWAY={
+        'BACKEND': 'payments.gateways.FakeGateway',
+        'OPTIONS': {'decline_amounts': [500]},
+    })
+    def test_declined_payment(self):
+        Course.objects.filter(pk=self.course.pk).update(price=500)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            self.payment_url, self.card_data, format='json'
+        )
+
+        self.assertEqual(response.data['message'], "Card Payment Failed")
+        self.assertEqual(
+            response.data['payment_confirm']['code'], 'card_declined'
+        )
+        self.assertFalse(Payment.objects.exists())
+
+    def _pay_with_key(self, key, data=None):
+        return self.client.post(
+            self.payment_url,
+            data or self.card_data,
+            format='json',
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_idempotent_repeat_charges_once(self):
+        """
+        Test that a repeated request with the same Idempotency-Key returns
+        the first response without charging again.
+        """
+        self.client.force_authenticate(user=self.user)
+        first = self._pay_with_key('checkout-1')
+        repeat = self._pay_with_key('checkout-1')
+
+        self.assertEqual(repeat.status_code, first.status_code)
+        self.assertEqual(repeat['Idempotent-Replayed'], 'true')
+        self.assertEqual(
+            repeat.json()['payment_intent']['id'],
+            first.data['payment_intent']['id']
+        )
+        self.assertNotIn('card_details', repeat.json())
+        self.assertEqual(len(get_gateway().payment_intents), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_idempotency_key_in_progress(self):
+        """
+        Test that a repeat arriving while the first request is still
+        running gets 409 (Conflict).
+        """
+        self.client.force_authenticate(user=self.user)
+        self._pay_with_key('checkout-1')
+        IdempotencyKey.objects.update(status_code=None, response=None)
+
+        response = self._pay_with_key('checkout-1')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_idempotency_key_reused_for_other_request(self):
+        """
+        Test that a key reused with a different body gets 422
+        (Unprocessable Entity).
+        """
+        self.client.force_authenticate(user=self.user)
+        self._pay_with_key('checkout-1')
+
+        response = self._pay_with_key(
+            'checkout-1', {**self.card_data, 'cvc': '999'}
+        )
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
 
     def test_unauthorized_payment(self):
         response = self.client.post(
@@ -45,3 +151,783 @@ class PaymentAPITests(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class LessonEntitlementTests(APITestCase):
+    """
+    Test cases for the cached paid-content check of lesson retrieval.
+
+    Methods:
+        test_unpaid_lesson_is_denied(): Test that a lesson the user has not
+        paid for is denied, also for conditional requests.
+        test_payment_grants_access(): Test that a new payment unlocks the
+        lesson for a user whose entitlements are already cached.
+        test_cached_check_costs_no_query(): Test that a cached entitlement
+        check adds no query to the lesson fetch.
+        test_course_payment_unlocks_lessons(): Test that paying for a course
+        gives access to its lessons.
+        test_list_marks_unlocked_lessons(): Test that the lesson list flags
+        the lessons the user may read.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@gmail.com",
+            password="testpassword"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+        self.lesson = Lesson.objects.create(
+            title="Test Lesson",
+            description="Test Lesson Description",
+            course=self.course,
+            price=100
+        )
+        self.url = reverse('lessons:lesson-retrieve', args=[self.lesson.pk])
+        self.client.force_authenticate(user=self.user)
+
+    def _pay_for_lesson(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                user=self.user, lesson=self.lesson, paid_price=100
+            )
+
+    def test_unpaid_lesson_is_denied(self):
+        """
+        Test that an unpaid lesson is denied, and that a matching ETag does
+        not turn the denial into 304 (Not Modified).
+        """
+        self._pay_for_lesson()
+        etag = self.client.get(self.url)['ETag']
+        Payment.objects.all().delete()
+        cache.clear()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_payment_grants_access(self):
+        """
+        Test that a payment unlocks the lesson although the user's
+        entitlements were cached before it.
+        """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self._pay_for_lesson()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.lesson.pk)
+
+    def test_cached_check_costs_no_query(self):
+        """
+        Test that once the entitlements are cached, retrieving a lesson
+        runs only the lesson query.
+        """
+        self._pay_for_lesson()
+        self.client.get(self.url)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_course_payment_unlocks_lessons(self):
+        """
+        Test that a course payment gives access to the course's lessons.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                user=self.user, course=self.course, paid_price=100
+            )
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['is_unlocked'])
+
+    def test_list_marks_unlocked_lessons(self):
+        """
+        Test that the lesson list flags the paid lesson as unlocked and the
+        others as locked, and that a purchase changes the list's ETag.
+        """
+        other = Lesson.objects.create(
+            title="Other Lesson",
+            description="Other Lesson Description",
+            course=Course.objects.create(
+                title="Other Course", description="Other Course Description"
+            ),
+            price=100
+        )
+        list_url = reverse('lessons:lesson-list')
+        etag = self.client.get(list_url)['ETag']
+
+        self._pay_for_lesson()
+
+        response = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        unlocked = {
+            lesson['id']: lesson['is_unlocked']
+            for lesson in response.data['results']
+        }
+        self.assertEqual(unlocked, {self.lesson.pk: True, other.pk: False})
+
+
+class LocalStripeHandler(BaseHTTPRequestHandler):
+    """
+    The few Stripe API endpoints used by the card payment flow.
+
+    Every PaymentIntent succeeds with the 'card' payment method, unless the
+    server's 'decline' flag is set.
+    """
+
+    def send_json(self, code, data):
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def payment_intent(self, intent_status):
+        intent = {
+            'id': 'pi_local',
+            'object': 'payment_intent',
+            'amount': 100,
+            'amount_received': 100,
+            'payment_method': 'pm_local',
+            'status': intent_status,
+        }
+        if intent_status == 'requires_payment_method':
+            intent['last_payment_error'] = {
+                'code': 'card_declined',
+                'message': 'Your card was declined.',
+            }
+        return intent
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path == '/v1/payment_intents':
+            self.send_json(200, self.payment_intent('requires_confirmation'))
+        elif self.server.decline:
+            self.send_json(402, {'error': {
+                'type': 'card_error',
+                'code': 'card_declined',
+                'message': 'Your card was declined.',
+            }})
+        else:
+            self.send_json(200, self.payment_intent('succeeded'))
+
+    def do_GET(self):
+        if self.path.startswith('/v1/payment_methods/'):
+            self.send_json(200, {
+                'id': 'pm_local', 'object': 'payment_method', 'type': 'card'
+            })
+        elif self.server.decline:
+            self.send_json(200, self.payment_intent('requires_payment_method'))
+        else:
+            self.send_json(200, self.payment_intent('succeeded'))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AsyncPaymentTests(APITestCase):
+    """
+    Test cases for the asynchronous payment mode of PaymentAPI.
+
+    The Celery task runs in-process and talks to a local Stripe stand-in.
+
+    Methods:
+        test_payment_is_accepted_and_confirmed(): Test the 202 answer and
+        the successful background confirmation.
+        test_declined_payment_fails(): Test that a declined card marks the
+        attempt as failed without creating a Payment.
+        test_attempts_are_private(): Test that users cannot see the attempts
+        of other users.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.stripe_server = ThreadingHTTPServer(
+            ('127.0.0.1', 0), LocalStripeHandler
+        )
+        cls.stripe_server.decline = False
+        threading.Thread(
+            target=cls.stripe_server.serve_forever, daemon=True
+        ).start()
+        host, port = cls.stripe_server.server_address
+        cls.settings_override = override_settings(
+            STRIPE_BASE_URL=f'http://{host}:{port}',
+            STRIPE_SECRET_KEY='sk_test_local'
+        )
+        cls.settings_override.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.settings_override.disable()
+        cls.stripe_server.shutdown()
+        cls.stripe_server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.stripe_server.decline = False
+        self.user = User.objects.create_user(
+            email="test@gmail.com",
+            password="testpassword"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description",
+            price=100
+        )
+        self.payment_url = reverse(
+            'payments:make_payment', args=['course', self.course.pk]
+        )
+        self.card_data = {
+            "payment_method": "card",
+            "card_number": "4242424242424242",
+            "expiry_month": "12",
+            "expiry_year": "2099",
+            "cvc": "123",
+        }
+        self.client.force_authenticate(user=self.user)
+
+    def _pay(self):
+        with mock.patch(
+            'payments.views.process_payment_attempt.delay',
+            side_effect=process_payment_attempt
+        ), self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.payment_url,
+                self.card_data,
+                format='json',
+                HTTP_PREFER='respond-async'
+            )
+
+    def test_payment_is_accepted_and_confirmed(self):
+        """
+        Test that the endpoint answers 202 with a status URL and that the
+        task confirms the payment and creates the Payment.
+        """
+        response = self._pay()
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertEqual(response['Location'], response.data['status_url'])
+
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], 'succeeded')
+        payment = Payment.objects.get(user=self.user, course=self.course)
+        self.assertEqual(response.data['payment'], payment.pk)
+        self.assertEqual(payment.paid_price, 100)
+        self.assertEqual(payment.payment_method, 'card')
+
+    def test_declined_payment_fails(self):
+        """
+        Test that a declined card leaves a failed attempt with the reason
+        and no Payment.
+        """
+        self.stripe_server.decline = True
+        response = self._pay()
+
+        response = self.client.get(response.data['status_url'])
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(response.data['error'], 'Your card was declined.')
+        self.assertFalse(Payment.objects.exists())
+
+    def test_attempts_are_private(self):
+        """
+        Test that another user gets 404 (Not Found) for an attempt.
+        """
+        attempt = PaymentAttempt.objects.create(
+            user=self.user, course=self.course, amount=100
+        )
+        other = User.objects.create_user(
+            email="other@gmail.com",
+            password="testpassword"
+        )
+        self.client.force_authenticate(user=other)
+
+        response = self.client.get(
+            reverse('payments:payment-attempt', args=[attempt.pk])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+class StripeWebhookTests(APITestCase):
+    """
+    Test cases for the Stripe webhook endpoint and event processing.
+
+    Methods:
+        test_invalid_signature_is_rejected(): Test that an unsigned event is
+        rejected and not stored.
+        test_unconfigured_secret_rejects_events(): Test that no event is
+        accepted while the webhook secret is unset.
+        test_redelivered_event_is_stored_once(): Test that a redelivered
+        event is acknowledged but stored once.
+        test_webhooks_settle_attempts_in_flight(): Test that events for
+        attempts being confirmed settle them and refunds mark payments.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('payments:stripe-webhook')
+        self.user = User.objects.create_user(
+            email="test@gmail.com",
+            password="testpassword"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+        self.lesson = Lesson.objects.create(
+            title="Test Lesson",
+            description="Test Lesson Description",
+            course=self.course,
+            price=100
+        )
+
+    def _post(self, event, secret='whsec_test'):
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(
+            secret.encode(),
+            f'{timestamp}.{payload}'.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        return self.client.post(
+            self.url,
+            payload,
+            content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=f't={timestamp},v1={signature}'
+        )
+
+    @staticmethod
+    def _event(event_id, event_type, data):
+        return {
+            'id': event_id,
+            'object': 'event',
+            'type': event_type,
+            'data': {'object': data},
+        }
+
+    def test_invalid_signature_is_rejected(self):
+        """
+        Test that an event signed with another secret gets 400 (Bad
+        Request) and is not stored.
+        """
+        response = self._post(
+            self._event('evt_1', 'payment_intent.succeeded', {'id': 'pi_1'}),
+            secret='whsec_other'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_unconfigured_secret_rejects_events(self):
+        """
+        Test that an event signed with an empty key gets 503 (Service
+        Unavailable) and is not stored when the secret is unset.
+        """
+        for secret in (None, ''):
+            with self.settings(STRIPE_WEBHOOK_SECRET=secret):
+                response = self._post(
+                    self._event('evt_1', 'charge.refunded', {
+                        'id': 'ch_1', 'payment_intent': 'pi_1',
+                    }),
+                    secret=''
+                )
+
+            self.assertEqual(
+                response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_redelivered_event_is_stored_once(self):
+        """
+        Test that the same event delivered twice is acknowledged both times
+        and stored once.
+        """
+        event = self._event(
+            'evt_1', 'payment_intent.succeeded', {'id': 'pi_1'}
+        )
+        for _ in range(2):
+            response = self._post(event)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+    def _confirm_and_notify(self, confirm):
+        """
+        Wrap 'FakeGateway.confirm_payment_intent' so that Stripe's webhook
+        for the PaymentIntent is delivered and processed before the
+        confirmation returns to 'process_payment_attempt'.
+        """
+        def confirm_payment_intent(gateway, payment_intent_id):
+            attempt = PaymentAttempt.objects.get(
+                payment_intent=payment_intent_id
+            )
+            self.assertEqual(attempt.status, PaymentAttempt.STATUS_PROCESSING)
+            try:
+                return confirm(gateway, payment_intent_id)
+            finally:
+                intent = gateway.payment_intents[payment_intent_id]
+                if intent['status'] == 'succeeded':
+                    event = self._event(
+                        f'evt_{payment_intent_id}', 'payment_intent.succeeded',
+                        dict(intent, payment_method_types=['card'])
+                    )
+                else:
+                    event = self._event(
+                        f'evt_{payment_intent_id}',
+                        'payment_intent.payment_failed',
+                        intent
+                    )
+                self._post(event)
+                process_stripe_events(batch_size=1)
+
+        return confirm_payment_intent
+
+    @override_settings(PAYMENT_GATEWAY={
+        'BACKEND': 'payments.gateways.FakeGateway',
+        'OPTIONS': {'decline_amounts': [500]},
+    })
+    def test_webhooks_settle_attempts_in_flight(self):
+        """
+        Test that webhooks arriving while 'process_payment_attempt' is
+        confirming settle the attempts: a success creates the Payment once,
+        a decline fails the attempt, and a later refund marks the Payment
+        as refunded, revokes its access and removes it from the rollups.
+        """
+        paid = PaymentAttempt.objects.create(
+            user=self.user, course=self.course, amount=100
+        )
+        declined = PaymentAttempt.objects.create(
+            user=self.user, lesson=self.lesson, amount=500
+        )
+        with mock.patch.object(
+            FakeGateway,
+            'confirm_payment_intent',
+            autospec=True,
+            side_effect=self._confirm_and_notify(
+                FakeGateway.confirm_payment_intent
+            )
+        ):
+            process_payment_attempt(paid.pk)
+            process_payment_attempt(declined.pk)
+
+        paid.refresh_from_db()
+        declined.refresh_from_db()
+        self.assertEqual(paid.status, PaymentAttempt.STATUS_SUCCEEDED)
+        self.assertEqual(Payment.objects.get(), paid.payment)
+        self.assertEqual(paid.payment.payment_intent, paid.payment_intent)
+        self.assertEqual(paid.payment.paid_price, 100)
+        self.assertEqual(declined.status, PaymentAttempt.STATUS_FAILED)
+        self.assertEqual(declined.error, 'Your card was declined.')
+        self.assertIsNotNone(declined.payment_intent)
+        self.assertEqual(StripeEvent.objects.count(), 2)
+        self.assertFalse(
+            StripeEvent.objects.filter(processed_at__isnull=True).exists()
+        )
+
+        self._post(self._event('evt_3', 'charge.refunded', {
+            'id': 'ch_1', 'payment_intent': paid.payment_intent,
+            'refunded': True,
+        }))
+        process_stripe_events()
+
+        payment = Payment.objects.get()
+        self.assertIsNotNone(payment.refunded_at)
+        self.assertEqual(get_entitlements(self.user.pk)['course'], set())
+        self.assertEqual(
+            CourseDailyRevenue.objects.get(course=self.course).revenue, 0
+        )
+        rebuild_rollups()
+        self.assertFalse(CourseDailyRevenue.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Payment.objects.create(
+                user=self.user, course=self.course, paid_price=100
+            )
+        self.assertEqual(
+            get_entitlements(self.user.pk)['course'], {self.course.pk}
+        )
+
+
+class RevenueRollupTests(APITestCase):
+    """
+    Test cases for the daily revenue rollups and the revenue reports.
+
+    Methods:
+        test_payments_update_rollups(): Test that creating and deleting
+        payments keeps the rollups in step.
+        test_rebuild_matches_incremental_rollups(): Test that a rebuild
+        from the payments gives the incrementally maintained rows.
+        test_report_reads_rollups(): Test that a report is one rollup query
+        and staff only.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            email="owner@gmail.com",
+            password="testpassword"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description",
+            owner=self.owner
+        )
+        self.lesson = Lesson.objects.create(
+            title="Test Lesson",
+            description="Test Lesson Description",
+            course=self.course,
+            price=100,
+            owner=self.owner
+        )
+        self.buyers = [
+            User.objects.create_user(
+                email=f"buyer{index}@gmail.com",
+                password="testpassword"
+            )
+            for index in range(3)
+        ]
+        self.payments = [
+            Payment.objects.create(
+                user=self.buyers[0], course=self.course, paid_price=200,
+                payment_method='card'
+            ),
+            Payment.objects.create(
+                user=self.buyers[1], course=self.course, paid_price=200,
+                payment_method='card'
+            ),
+            Payment.objects.create(
+                user=self.buyers[2], lesson=self.lesson, paid_price=100,
+                payment_method='cash'
+            ),
+        ]
+
+    @staticmethod
+    def _snapshot():
+        return {
+            model.__name__: sorted(
+                model.objects.values_list(
+                    model._meta.fields[-1].attname,
+                    'date',
+                    'revenue',
+                    'payment_count'
+                )
+            )
+            for model in (
+                CourseDailyRevenue, OwnerDailyRevenue,
+                PaymentMethodDailyRevenue
+            )
+        }
+
+    def test_payments_update_rollups(self):
+        """
+        Test that the rollups sum the payments per course, owner and
+        payment method, and that a deleted payment is subtracted.
+        """
+        course_day = CourseDailyRevenue.objects.get(course=self.course)
+        self.assertEqual(course_day.revenue, 400)
+        self.assertEqual(course_day.payment_count, 2)
+        owner_day = OwnerDailyRevenue.objects.get(owner=self.owner)
+        self.assertEqual(owner_day.revenue, 500)
+        self.assertEqual(owner_day.payment_count, 3)
+
+        self.payments[0].delete()
+
+        course_day.refresh_from_db()
+        self.assertEqual(course_day.revenue, 200)
+        self.assertEqual(course_day.payment_count, 1)
+        self.assertEqual(
+            PaymentMethodDailyRevenue.objects.get(
+                payment_method='card'
+            ).revenue,
+            200
+        )
+
+    def test_rebuild_matches_incremental_rollups(self):
+        """
+        Test that rebuilding the rollups from the payments reproduces the
+        incrementally maintained rows.
+        """
+        incremental = self._snapshot()
+        CourseDailyRevenue.objects.update(revenue=0)
+        OwnerDailyRevenue.objects.all().delete()
+
+        rebuild_rollups()
+
+        self.assertEqual(self._snapshot(), incremental)
+
+    def test_report_reads_rollups(self):
+        """
+        Test that the course report returns the summed rollup rows in one
+        query, and that non-staff users get 403 (Forbidden).
+        """
+        url = reverse('payments:revenue-courses')
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.owner.is_staff = True
+        self.client.force_authenticate(user=self.owner)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data['results'],
+            [{'course': self.course.pk, 'revenue': 400, 'payment_count': 2}]
+        )
+
+
+class PaymentsExportTests(APITestCase):
+    """
+    Test cases for the streaming payments export.
+
+    Methods:
+        test_csv_export(): Test the streamed CSV rows and the filters.
+        test_ndjson_export(): Test the streamed NDJSON lines.
+        test_export_is_staff_only(): Test that other users get 403.
+    """
+
+    def setUp(self):
+        self.staff = User.objects.create_user(
+            email="staff@gmail.com",
+            password="testpassword",
+            is_staff=True
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+        self.payments = [
+            Payment.objects.create(
+                user=User.objects.create_user(
+                    email=f"buyer{index}@gmail.com",
+                    password="testpassword"
+                ),
+                course=self.course,
+                paid_price=100 * (index + 1),
+                payment_method='card' if index % 2 else 'cash'
+            )
+            for index in range(5)
+        ]
+        self.client.force_authenticate(user=self.staff)
+
+    def _content(self, response):
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        """
+        Test that the CSV export has a header row and one row per payment
+        matching the filter, ordered by ID.
+        """
+        response = self.client.get(
+            reverse('payments:payment-export', args=['csv']),
+            {'payment_method': 'card'}
+        )
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(self._content(response))))
+        self.assertEqual(rows[0][:2], ['id', 'user'])
+        self.assertEqual(
+            [int(row[0]) for row in rows[1:]],
+            [payment.pk for payment in self.payments[1::2]]
+        )
+
+    def test_ndjson_export(self):
+        """
+        Test that the NDJSON export has one JSON object per payment.
+        """
+        response = self.client.get(
+            reverse('payments:payment-export', args=['ndjson'])
+        )
+
+        lines = [
+            json.loads(line)
+            for line in self._content(response).splitlines()
+        ]
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[0]['paid_price'], 100)
+        self.assertEqual(lines[0]['course'], self.course.pk)
+
+    def test_export_is_staff_only(self):
+        """
+        Test that a non-staff user gets 403 (Forbidden) and an unknown
+        format 404 (Not Found).
+        """
+        response = self.client.get(
+            reverse('payments:payment-export', args=['xml'])
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.payments[0].user)
+        response = self.client.get(
+            reverse('payments:payment-export', args=['csv'])
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ProductPriceTests(APITestCase):
+    """
+    Test cases for the product registry of PaymentAPI.
+
+    Methods:
+        test_unknown_product_type_fails_fast(): Test that an unknown product
+        type gets 404 without a database query.
+        test_missing_product(): Test that a missing product gets 404.
+        test_price_is_cached_until_saved(): Test that the price is read
+        once and re-read after the product is saved.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="test@gmail.com",
+            password="testpassword"
+        )
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description",
+            price=100
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_unknown_product_type_fails_fast(self):
+        """
+        Test that paying for an unknown product type gets 404 (Not Found)
+        before any query runs.
+        """
+        url = reverse('payments:make_payment', args=['user', self.user.pk])
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_missing_product(self):
+        """
+        Test that paying for a course that does not exist gets 404.
+        """
+        url = reverse('payments:make_payment', args=['course', 999])
+        response = self.client.post(url, {}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_price_is_cached_until_saved(self):
+        """
+        Test that the price is read from the database once, and again
+        after the course is saved with a new price.
+        """
+        with self.assertNumQueries(1):
+            self.assertEqual(get_product_price('course', self.course.pk), 100)
+            self.assertEqual(get_product_price('course', self.course.pk), 100)
+
+        self.course.price = 250
+        self.course.save()
+
+        self.assertEqual(get_product_price('course', self.course.pk), 250)
@@ -18,7 +18,17 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from lessons.apps import LessonsConfig
-from payments.views import PaymentsListView, PaymentAPI
+from payments.views import (
+    CourseRevenueReportView,
+    LessonRevenueReportView,
+    OwnerRevenueReportView,
+    PaymentAPI,
+    PaymentAttemptRetrieveView,
+    PaymentMethodRevenueReportView,
+    PaymentsExportView,
+    PaymentsListView,
+    StripeWebhookView,
+)
 
 app_name = LessonsConfig.name
 
@@ -26,9 +36,44 @@ router = DefaultRouter()
 
 urlpatterns = [
                   path('', PaymentsListView.as_view(), name='payment-list'),
+                  path(
+                      'export.<str:file_format>',
+                      PaymentsExportView.as_view(),
+                      name='payment-export'
+                      ),
                   path(
                       'make_payment/<str:model_name>/<int:model_id>',
                       PaymentAPI.as_view(),
                       name='make_payment'
                       ),
+                  path(
+                      'attempts/<int:pk>',
+                      PaymentAttemptRetrieveView.as_view(),
+                      name='payment-attempt'
+                      ),
+                  path(
+                      'webhook/',
+                      StripeWebhookView.as_view(),
+                      name='stripe-webhook'
+                      ),
+                  path(
+                      'reports/courses/',
+                      CourseRevenueReportView.as_view(),
+                      name='revenue-courses'
+                      ),
+                  path(
+                      'reports/lessons/',
+                      LessonRevenueReportView.as_view(),
+                      name='revenue-lessons'
+                      ),
+                  path(
+                      'reports/owners/',
+                      OwnerRevenueReportView.as_view(),
+                      name='revenue-owners'
+                      ),
+                  path(
+                      'reports/payment-methods/',
+                      PaymentMethodRevenueReportView.as_view(),
+                      name='revenue-payment-methods'
+                      ),
               ] + router.urls
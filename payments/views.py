@@ -1,18 +1,56 @@
+import csv
+import json
+from datetime import timedelta
+from functools import partial
+
 import stripe
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Sum
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django_filters import rest_framework as filters
 from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from payments.models import Payment
-from payments.serializers import PaymentsSerializer, CardInformationSerializer
+from payments.idempotency import (
+    IDEMPOTENCY_HEADER,
+    claim_idempotency_key,
+    complete_idempotency_key,
+    gateway_idempotency_key,
+    release_idempotency_key,
+)
+from payments.models import (
+    CourseDailyRevenue,
+    LessonDailyRevenue,
+    OwnerDailyRevenue,
+    Payment,
+    PaymentAttempt,
+    PaymentMethodDailyRevenue,
+    StripeEvent,
+)
+from payments.products import get_product_model, get_product_price
+from payments.rollups import ROLLUPS
+from payments.paginators import PaymentsCursorPaginator
+from payments.serializers import (
+    CardInformationSerializer,
+    PaymentAttemptSerializer,
+    PaymentsSerializer,
+)
 from payments.services import stripe_card_payment, save_payment_if_valid
+from payments.tasks import process_payment_attempt
 from payments.validators import product_owner_validation
+from sevice.mixins import KeysetPaginationMixin
 
 
-class PaymentsListView(generics.ListAPIView):
+class PaymentsListView(KeysetPaginationMixin, generics.ListAPIView):
     """
     List view for payments with filtering and ordering options.
 
@@ -30,6 +68,8 @@ class PaymentsListView(generics.ListAPIView):
         DjangoFilterBackend and OrderingFilter.
         filterset_fields: Fields on which clients can filter the payments.
         ordering_fields: Fields on which clients can order the payments.
+        keyset_pagination_class: The keyset paginator used when the client
+        requests '?pagination=cursor'; the list is not paginated otherwise.
 
     Usage:
         - Use this view to expose a list of payments with filtering and
@@ -59,36 +99,177 @@ class PaymentsListView(generics.ListAPIView):
 
     filterset_fields = ['payment_method', 'course', 'lesson']
     ordering_fields = ['payment_date']
+    keyset_pagination_class = PaymentsCursorPaginator
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value instead of storing
+    it, so csv.writer can produce lines for a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+class PaymentsExportView(generics.GenericAPIView):
+    """
+    Stream all payments as a CSV or NDJSON file.
+
+    The filtered queryset is read with 'values()' and
+    'iterator(chunk_size=...)' (a server-side cursor on PostgreSQL) and
+    written out chunk by chunk through a StreamingHttpResponse, so no model
+    instances or serializers are built and memory use does not grow with
+    the number of rows.
+
+    Permissions:
+        - Only staff users can export payments (IsAdminUser).
+
+    Request:
+        - HTTP method: GET
+        - URL: 'export.csv' or 'export.ndjson'.
+        - Query parameters: the filterset fields of PaymentsListView
+        ('payment_method', 'course', 'lesson').
+
+    Response:
+        - A 'payments.csv' (with a header row) or 'payments.ndjson'
+        attachment, one payment per line, ordered by ID. Refunded payments
+        are included, with their 'refunded_at' time.
+    """
+
+    permission_classes = [IsAdminUser]
+    queryset = Payment.objects.all()
+    filter_backends = [filters.DjangoFilterBackend]
+    filterset_fields = PaymentsListView.filterset_fields
+
+    columns = (
+        'id',
+        'user',
+        'payment_date',
+        'course',
+        'lesson',
+        'paid_price',
+        'payment_method',
+        'refunded_at',
+    )
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+    chunk_size = 2000
+
+    def get(self, request, file_format):
+        if file_format not in self.content_types:
+            raise NotFound(f'Unsupported export format: {file_format}')
+
+        rows = self.filter_queryset(self.get_queryset()).order_by(
+            'id'
+        ).values(*self.columns).iterator(chunk_size=self.chunk_size)
+        write = getattr(self, f'write_{file_format}')
+
+        response = StreamingHttpResponse(
+            write(rows), content_type=self.content_types[file_format]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="payments.{file_format}"'
+        )
+        return response
+
+    def chunks(self, lines):
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) == self.chunk_size:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+
+    def write_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.columns)
+        yield from self.chunks(
+            writer.writerow([row[column] for column in self.columns])
+            for row in rows
+        )
+
+    def write_ndjson(self, rows):
+        yield from self.chunks(
+            json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows
+        )
 
 
 class PaymentAPI(APIView):
+    """
+    Pay for a course or a lesson with a card.
+
+    By default the payment is confirmed with Stripe within the request.
+    With the 'Prefer: respond-async' request header, or with the
+    'PAYMENT_ASYNC' setting, a PaymentAttempt is recorded instead and the
+    response is 202 (Accepted) with the attempt ID and the URL of its
+    status endpoint; the 'process_payment_attempt' Celery task confirms it
+    and creates the Payment.
+
+    Idempotency:
+        - With an 'Idempotency-Key' header, a repeat of the request returns
+        the stored response of the first one, a concurrent repeat gets 409
+        (Conflict) and the key is passed on to the payment gateway, so a
+        retried or double-clicked request never charges twice. Keys expire
+        after 'IDEMPOTENCY_KEY_TTL'.
+    """
+
     serializer_class = CardInformationSerializer
 
+    @staticmethod
+    def respond_async(request):
+        return (
+            settings.PAYMENT_ASYNC
+            or 'respond-async' in request.headers.get('Prefer', '')
+        )
+
     def post(self, request, model_name, model_id):
-        from django.apps import apps
+        get_product_model(model_name)
 
-        model = apps.get_model(
-            app_label=f'{model_name.lower()}s',
-            model_name=model_name.title()
-        )
-        product = model.objects.get(id=model_id)
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return self.make_payment(request, model_name, model_id)
+
+        record, response = claim_idempotency_key(request, key)
+        if response is not None:
+            return response
+
+        try:
+            response = self.make_payment(
+                request, model_name, model_id,
+                idempotency_key=gateway_idempotency_key(request.user.pk, key)
+            )
+        except Exception:
+            release_idempotency_key(record)
+            raise
+        complete_idempotency_key(record, response)
+        return response
+
+    def make_payment(self, request, model_name, model_id,
+                     idempotency_key=None):
+        product_price = get_product_price(model_name, model_id)
         payment = {
             'user': request.user,
-            f'{model_name}': product
+            f'{model_name}_id': model_id
         }
 
         product_owner_validation(payment)
 
         serializer = self.serializer_class(data=request.data)
         if serializer.is_valid():
+            if self.respond_async(request):
+                return self.accept_payment(payment, product_price)
 
-            stripe.api_key = settings.STRIPE_SECRET_KEY
             data_dict = serializer.data
 
-            product_price = product.price
             response = stripe_card_payment(
                 data_dict=data_dict,
-                product_price=product_price
+                product_price=product_price,
+                idempotency_key=idempotency_key
             )
 
             save_payment_if_valid(response, payment)
@@ -100,3 +281,173 @@ class PaymentAPI(APIView):
             }
 
         return Response(response)
+
+    @staticmethod
+    def accept_payment(payment, amount):
+        """
+        Record a pending payment and confirm it in the background.
+
+        The task is queued only after the attempt is committed, so the
+        worker always finds it.
+
+        Returns:
+            Response: 202 (Accepted) with the attempt ID and status URL.
+        """
+        attempt = PaymentAttempt.objects.create(amount=amount, **payment)
+        transaction.on_commit(
+            partial(process_payment_attempt.delay, attempt.pk)
+        )
+
+        status_url = reverse('payments:payment-attempt', args=[attempt.pk])
+        return Response(
+            {
+                'payment_attempt': attempt.pk,
+                'status': attempt.status,
+                'status_url': status_url,
+            },
+            status=status.HTTP_202_ACCEPTED,
+            headers={
+                'Location': status_url,
+                'Preference-Applied': 'respond-async',
+            }
+        )
+
+
+class PaymentAttemptRetrieveView(generics.RetrieveAPIView):
+    """
+    Return the status of one of the user's asynchronous payments.
+
+    Clients poll this endpoint after PaymentAPI answered 202 (Accepted)
+    until 'status' is 'succeeded' or 'failed'. Users only see their own
+    attempts.
+    """
+
+    serializer_class = PaymentAttemptSerializer
+
+    def get_queryset(self):
+        return PaymentAttempt.objects.filter(user=self.request.user)
+
+
+class StripeWebhookView(APIView):
+    """
+    Receive Stripe webhook events.
+
+    The view only verifies the 'Stripe-Signature' header against
+    'STRIPE_WEBHOOK_SECRET' and inserts the raw event, keyed by its ID, so
+    redelivered events are dropped by the database and Stripe gets its
+    answer after a single insert. The 'process_stripe_events' task applies
+    the stored events to payments in batches.
+
+    Response:
+        - HTTP status: 200 OK once the event is stored (or was already).
+        - HTTP status: 400 Bad Request for an invalid payload or signature.
+        - HTTP status: 503 Service Unavailable if 'STRIPE_WEBHOOK_SECRET'
+        is not configured; no event is accepted without verification.
+    """
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        if not settings.STRIPE_WEBHOOK_SECRET:
+            return Response(
+                {'error': 'Stripe webhooks are not configured'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body,
+                request.headers.get('Stripe-Signature', ''),
+                settings.STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return Response(
+                {'error': 'Invalid payload or signature'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        StripeEvent.objects.bulk_create(
+            [
+                StripeEvent(
+                    event_id=event['id'],
+                    type=event['type'],
+                    payload=json.loads(request.body)
+                )
+            ],
+            ignore_conflicts=True
+        )
+        return Response({'received': True})
+
+
+class RevenueReportView(APIView):
+    """
+    Revenue report read from a daily revenue rollup.
+
+    The report sums the rollup rows of the requested days per dimension
+    value (course, lesson, owner or payment method), so its cost depends
+    on the number of days and products, not on the number of payments.
+
+    Permissions:
+        - Only staff users can read revenue reports (IsAdminUser).
+
+    Query parameters:
+        date_from (str): The first day, ISO date (default: 30 days ago).
+        date_to (str): The last day, ISO date (default: today).
+
+    Response:
+        - 'date_from', 'date_to' and 'results': one row per dimension value
+        with 'revenue' and 'payment_count', highest revenue first.
+    """
+
+    permission_classes = [IsAdminUser]
+    rollup_model = None
+    default_days = 30
+
+    def get_date(self, name, default):
+        value = self.request.query_params.get(name)
+        if not value:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: 'A valid ISO date is required.'})
+        return day
+
+    def get(self, request):
+        date_to = self.get_date('date_to', timezone.now().date())
+        date_from = self.get_date(
+            'date_from', date_to - timedelta(days=self.default_days - 1)
+        )
+        field = ROLLUPS[self.rollup_model][0]
+
+        rows = self.rollup_model.objects.filter(
+            date__range=(date_from, date_to)
+        ).values(field).annotate(
+            revenue=Sum('revenue'),
+            payment_count=Sum('payment_count')
+        ).order_by('-revenue', field)
+
+        return Response({
+            'date_from': date_from,
+            'date_to': date_to,
+            'results': list(rows),
+        })
+
+
+class CourseRevenueReportView(RevenueReportView):
+    rollup_model = CourseDailyRevenue
+
+
+class LessonRevenueReportView(RevenueReportView):
+    rollup_model = LessonDailyRevenue
+
+
+class OwnerRevenueReportView(RevenueReportView):
+    rollup_model = OwnerDailyRevenue
+
+
+class PaymentMethodRevenueReportView(RevenueReportView):
+    rollup_model = PaymentMethodDailyRevenue
@@ -0,0 +1,107 @@
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from payments.models import Payment, PaymentAttempt
+from payments.rollups import record_payment
+
+PAYMENT_SUCCEEDED = 'payment_intent.succeeded'
+PAYMENT_FAILED = 'payment_intent.payment_failed'
+CHARGE_REFUNDED = 'charge.refunded'
+
+
+def _objects(events, event_type):
+    return [
+        event.payload['data']['object']
+        for event in events if event.type == event_type
+    ]
+
+
+def apply_stripe_events(events):
+    """
+    Apply a batch of Stripe webhook events to payments.
+
+    The attempts and payments the batch refers to are read with one query
+    each, and the open attempts are locked, so a concurrent
+    'process_payment_attempt' task and the webhook never both record the
+    same result.
+
+    - 'payment_intent.succeeded' creates the Payment of an open attempt,
+    or links the Payment already recorded for the PaymentIntent.
+    - 'payment_intent.payment_failed' marks an open attempt as failed.
+    - 'charge.refunded' sets 'refunded_at' on the Payment of a fully
+    refunded charge and subtracts it from the revenue rollups. The row is
+    kept; saving it drops the user's cached entitlements, and refunded
+    payments grant no access.
+    - Other event types are ignored.
+
+    Args:
+        events (list[StripeEvent]): The events, oldest first.
+    """
+    succeeded = _objects(events, PAYMENT_SUCCEEDED)
+    failed = _objects(events, PAYMENT_FAILED)
+    refunded = [
+        charge['payment_intent']
+        for charge in _objects(events, CHARGE_REFUNDED)
+        if charge.get('refunded') and charge.get('payment_intent')
+    ]
+
+    intent_ids = {intent['id'] for intent in succeeded + failed}
+    attempts = {
+        attempt.payment_intent: attempt
+        for attempt in PaymentAttempt.objects.select_for_update().filter(
+            payment_intent__in=intent_ids,
+            status__in=[
+                PaymentAttempt.STATUS_PENDING,
+                PaymentAttempt.STATUS_PROCESSING,
+            ]
+        )
+    }
+    payments = {
+        payment.payment_intent: payment
+        for payment in Payment.objects.filter(payment_intent__in=intent_ids)
+    }
+
+    for intent in succeeded:
+        attempt = attempts.pop(intent['id'], None)
+        if attempt is None:
+            continue
+        attempt.payment = payments.get(intent['id'])
+        if attempt.payment is None:
+            try:
+                with transaction.atomic():
+                    attempt.payment = Payment.objects.create(
+                        user_id=attempt.user_id,
+                        course_id=attempt.course_id,
+                        lesson_id=attempt.lesson_id,
+                        paid_price=intent['amount_received'],
+                        payment_method=(
+                            intent.get('payment_method_types') or [None]
+                        )[0],
+                        payment_intent=intent['id']
+                    )
+            except IntegrityError:
+                attempt.status = PaymentAttempt.STATUS_FAILED
+                attempt.error = 'You already bought this product'
+                attempt.save()
+                continue
+        attempt.status = PaymentAttempt.STATUS_SUCCEEDED
+        attempt.save()
+
+    for intent in failed:
+        attempt = attempts.pop(intent['id'], None)
+        if attempt is None:
+            continue
+        attempt.status = PaymentAttempt.STATUS_FAILED
+        attempt.error = (
+            (intent.get('last_payment_error') or {}).get('message')
+            or 'Payment failed'
+        )
+        attempt.save()
+
+    refunded_at = timezone.now()
+    for payment in Payment.objects.select_for_update().filter(
+        payment_intent__in=refunded, refunded_at__isnull=True
+    ):
+        payment.refunded_at = refunded_at
+        payment.save(update_fields=['refunded_at'])
+        record_payment(payment, sign=-1)
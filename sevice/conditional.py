@@ -0,0 +1,54 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the values the response content depends on.
+
+    Args:
+        *parts: Versions, timestamps, user IDs, paths etc.
+
+    Returns:
+        str: The quoted ETag value.
+    """
+    digest = hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def conditional_response(request, get_response, etag, last_modified=None):
+    """
+    Answer a conditional GET before the response is built.
+
+    If the request's 'If-None-Match' matches 'etag' (or, without it,
+    'If-Modified-Since' is not older than 'last_modified'), a
+    '304 Not Modified' response is returned and 'get_response' is never
+    called, so neither the queryset nor the serializer runs. Otherwise the
+    response is built and the validators are added to it.
+
+    Args:
+        request (Request): The HTTP request object.
+        get_response (callable): Builds the full response.
+        etag (str): The current ETag of the resource.
+        last_modified (datetime): The last modification time, optional.
+
+    Returns:
+        HttpResponse: The 304 response or the full response.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp
+    )
+    if response is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    patch_vary_headers(response, ['Authorization'])
+    return response
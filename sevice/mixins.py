@@ -0,0 +1,44 @@
+class KeysetPaginationMixin:
+    """
+    Mixin for list views that lets clients opt in to keyset pagination.
+
+    The view keeps its regular 'pagination_class'. When the request has
+    '?pagination=cursor' or already carries a 'cursor' parameter (the
+    'next' links do), 'keyset_pagination_class' is used instead.
+
+    Attributes:
+        keyset_pagination_class (KeysetPagination): The paginator used in
+        cursor mode.
+        pagination_mode_query_param (str): The query parameter that selects
+        the pagination mode.
+
+    Example:
+        ```python
+        class MyListView(KeysetPaginationMixin, generics.ListAPIView):
+            pagination_class = MyPaginator
+            keyset_pagination_class = MyCursorPaginator
+        ```
+    """
+
+    keyset_pagination_class = None
+    pagination_mode_query_param = 'pagination'
+
+    def use_keyset_pagination(self):
+        if self.keyset_pagination_class is None:
+            return False
+        params = self.request.query_params
+        return (
+            params.get(self.pagination_mode_query_param) == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param in params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_keyset_pagination():
+                self._paginator = self.keyset_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,132 @@
+import base64
+import binascii
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) paginator ordered by a timestamp and the primary key.
+
+    Unlike PageNumberPagination it runs neither a COUNT(*) nor an OFFSET:
+    every page is a range scan that starts right after the last row of the
+    previous page, so the cost of page N does not depend on N or on the
+    size of the table. The position is carried in an opaque 'cursor' query
+    parameter built from the '(ordering_field, id)' pair of the last row.
+
+    Attributes:
+        page_size (int): The default number of items on each page.
+        page_size_query_param (str): The query parameter used to specify the
+        number of items per page.
+        max_page_size (int): The maximum number of items per page that a
+        client can request.
+        cursor_query_param (str): The query parameter carrying the cursor.
+        ordering_field (str): The timestamp field the keyset is built on.
+        It must be backed by a composite '(ordering_field, id)' index.
+        descending (bool): Whether the newest rows come first.
+
+    Usage:
+        - Subclass it per model, set 'ordering_field' and enable it on a
+        view with KeysetPaginationMixin.
+    """
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering_field = 'date_added'
+    descending = True
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        prefix = '-' if self.descending else ''
+        queryset = queryset.order_by(
+            f'{prefix}{self.ordering_field}', f'{prefix}id'
+        )
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(*position))
+
+        results = list(queryset[:page_size + 1])
+        self.page = results[:page_size]
+        self.has_next = len(results) > page_size
+        return self.page
+
+    def get_position_filter(self, value, pk):
+        """
+        Return the filter selecting the rows that follow the position.
+
+        The redundant bound on the timestamp alone keeps the condition
+        usable as an index range on '(ordering_field, id)'.
+        """
+        if self.descending:
+            bound, strict, tie = 'lte', 'lt', 'id__lt'
+        else:
+            bound, strict, tie = 'gte', 'gt', 'id__gt'
+        field = self.ordering_field
+        return Q(**{f'{field}__{bound}': value}) & (
+            Q(**{f'{field}__{strict}': value})
+            | Q(**{field: value, tie: pk})
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            decoded = base64.urlsafe_b64decode(encoded.encode()).decode()
+            value, pk = decoded.rsplit('|', 1)
+            return datetime.fromisoformat(value), int(pk)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        value = getattr(instance, self.ordering_field)
+        raw = f'{value.isoformat()}|{instance.pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1])
+        )
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
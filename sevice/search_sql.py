@@ -0,0 +1,131 @@
+from django.db import migrations
+
+
+def create_search_index_sql(vendor, table):
+    """
+    Return the statements that add full-text search to a table.
+
+    On PostgreSQL a weighted 'search_vector' tsvector column (title 'A',
+    description 'B') is kept up to date by a trigger and indexed with GIN.
+    On SQLite an external-content FTS5 table '<table>_fts' is kept in step
+    with the table by triggers. Other backends get no search index.
+
+    Args:
+        vendor (str): The database vendor, e.g. 'postgresql' or 'sqlite'.
+        table (str): The table with 'id', 'title' and 'description' columns.
+
+    Returns:
+        list[str]: The SQL statements, in execution order.
+    """
+    if vendor == 'postgresql':
+        return [
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector',
+            f'''
+            CREATE FUNCTION {table}_search_vector_update()
+            RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := setweight(
+                    to_tsvector('simple', coalesce(NEW.title, '')), 'A'
+                ) || setweight(
+                    to_tsvector('simple', coalesce(NEW.description, '')), 'B'
+                );
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+            ''',
+            f'''
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF title, description ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+            ''',
+            f'UPDATE {table} SET title = title',
+            f'''
+            CREATE INDEX {table}_search_vector_idx
+            ON {table} USING GIN (search_vector)
+            ''',
+        ]
+    if vendor == 'sqlite':
+        return [
+            f'''
+            CREATE VIRTUAL TABLE {table}_fts USING fts5(
+                title, description, content='{table}', content_rowid='id'
+            )
+            ''',
+            f'''
+            CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {table}_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            ''',
+            f'''
+            CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {table}_fts
+                    ({table}_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+            ''',
+            f'''
+            CREATE TRIGGER {table}_fts_update
+            AFTER UPDATE OF title, description ON {table} BEGIN
+                INSERT INTO {table}_fts
+                    ({table}_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO {table}_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+            ''',
+            f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')",
+        ]
+    return []
+
+
+def drop_search_index_sql(vendor, table):
+    """
+    Return the statements that undo create_search_index_sql().
+
+    Args:
+        vendor (str): The database vendor.
+        table (str): The table passed to create_search_index_sql().
+
+    Returns:
+        list[str]: The SQL statements, in execution order.
+    """
+    if vendor == 'postgresql':
+        return [
+            f'DROP TRIGGER {table}_search_vector_trigger ON {table}',
+            f'DROP FUNCTION {table}_search_vector_update()',
+            f'ALTER TABLE {table} DROP COLUMN search_vector',
+        ]
+    if vendor == 'sqlite':
+        return [
+            f'DROP TRIGGER {table}_fts_insert',
+            f'DROP TRIGGER {table}_fts_delete',
+            f'DROP TRIGGER {table}_fts_update',
+            f'DROP TABLE {table}_fts',
+        ]
+    return []
+
+
+def add_search_index(table):
+    """
+    Return a migration operation that adds full-text search to a table.
+
+    The statements depend on the database vendor, so they are run from
+    RunPython rather than RunSQL.
+
+    Args:
+        table (str): The table with 'id', 'title' and 'description' columns.
+
+    Returns:
+        RunPython: The reversible migration operation.
+    """
+    def run(build_statements):
+        def execute(apps, schema_editor):
+            vendor = schema_editor.connection.vendor
+            for statement in build_statements(vendor, table):
+                schema_editor.execute(statement)
+        return execute
+
+    return migrations.RunPython(
+        run(create_search_index_sql), run(drop_search_index_sql)
+    )
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SubscribersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'subscribers'
+
+    def ready(self):
+        import subscribers.signals  # noqa: F401
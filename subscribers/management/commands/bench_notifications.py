@@ -0,0 +1,125 @@
+import socketserver
+import threading
+import time
+
+from django.core.management import BaseCommand
+from django.test.utils import override_settings
+
+from subscribers.tasks import send_notification, send_notification_batch
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """
+    A minimal SMTP server session that accepts and discards every message.
+
+    Each new connection waits 'server.handshake_delay' seconds before the
+    greeting, standing in for the TCP and TLS set-up of a real relay.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        time.sleep(self.server.handshake_delay)
+        self.reply('220 sink ESMTP')
+        while line := self.rfile.readline():
+            command = line.decode(errors='replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 sink')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline() not in (b'.\r\n', b''):
+                    pass
+                with self.server.lock:
+                    self.server.messages += 1
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay):
+        super().__init__(('127.0.0.1', 0), SMTPSinkHandler)
+        self.handshake_delay = handshake_delay
+        self.lock = threading.Lock()
+        self.messages = 0
+
+
+class Command(BaseCommand):
+    """
+    Benchmark the course-update notification e-mail throughput.
+
+    The command starts a local SMTP sink and sends the same notification
+    to '--recipients' addresses twice: once per recipient with
+    'send_notification' (one SMTP connection per message) and once with
+    'send_notification_batch' in batches of '--batch-size' (one connection
+    per batch). '--handshake-ms' adds a delay to every new connection to
+    approximate the TLS handshake of a remote relay. The tasks run
+    in-process; no broker or database is needed.
+
+    Usage:
+        python manage.py bench_notifications --recipients 5000
+    """
+
+    help = 'Benchmark the course-update notification e-mail throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--handshake-ms', type=float, default=0)
+
+    def handle(self, *args, **options):
+        sink = SMTPSink(options['handshake_ms'] / 1000)
+        threading.Thread(target=sink.serve_forever, daemon=True).start()
+
+        recipients = [
+            f'subscriber{index}@example.com'
+            for index in range(options['recipients'])
+        ]
+        batch_size = options['batch_size']
+        subject = 'Course - Benchmark Update Notification'
+        message = '<p>The course you are subscribed for is updated.</p>'
+
+        def per_recipient():
+            for recipient in recipients:
+                send_notification(recipient, message, subject)
+
+        def batched():
+            for start in range(0, len(recipients), batch_size):
+                send_notification_batch(
+                    recipients[start:start + batch_size], message, subject
+                )
+
+        try:
+            with override_settings(
+                EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=sink.server_address[1],
+                EMAIL_HOST_USER='',
+                EMAIL_HOST_PASSWORD='',
+                EMAIL_USE_TLS=False,
+                DEFAULT_FROM_EMAIL='noreply@example.com',
+            ):
+                self.report('one connection per message', per_recipient, sink)
+                self.report(
+                    f'batches of {batch_size} per connection', batched, sink
+                )
+        finally:
+            sink.shutdown()
+            sink.server_close()
+
+    def report(self, name, send, sink):
+        sink.messages = 0
+        started = time.perf_counter()
+        send()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name}: {sink.messages} messages in {elapsed:.2f} s '
+            f'({sink.messages / elapsed:.0f} messages/s)'
+        )
@@ -0,0 +1,44 @@
+from django.core.management import BaseCommand
+
+from subscribers.services import reap_legacy_notification_tasks
+
+
+class Command(BaseCommand):
+    """
+    Delete the per-course notification PeriodicTask rows left by the old
+    scheduler, and the CrontabSchedule rows only those tasks used.
+
+    Course notifications are now queued in the PendingNotification table
+    and sent by 'dispatch_due_notifications'; run this command once after
+    upgrading. '--requeue' moves the notifications that have not run yet
+    to the new queue, '--dry-run' only reports what would be removed.
+
+    Usage:
+        python manage.py reap_notification_tasks --dry-run
+        python manage.py reap_notification_tasks --requeue
+    """
+
+    help = 'Delete stale course notification PeriodicTask/CrontabSchedule rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue',
+            action='store_true',
+            help='Queue the notifications that have not run yet'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the rows that would be removed'
+        )
+
+    def handle(self, *args, **options):
+        counts = reap_legacy_notification_tasks(
+            requeue=options['requeue'], dry_run=options['dry_run']
+        )
+        prefix = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(
+            f"{prefix} {counts['tasks']} tasks and "
+            f"{counts['crontabs']} crontab schedules; "
+            f"requeued {counts['requeued']} notifications"
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_search_index'),
+        ('subscribers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_at', models.DateTimeField(db_index=True, verbose_name='due at')),
+                ('date_added', models.DateTimeField(auto_now_add=True, verbose_name='creation date')),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notification', to='courses.course')),
+            ],
+            options={
+                'verbose_name': 'pending notification',
+                'verbose_name_plural': 'pending notifications',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:38
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('subscribers', '0002_pendingnotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DigestEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_added', models.DateTimeField(auto_now_add=True, verbose_name='creation date')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to='courses.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='digest_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'digest event',
+                'verbose_name_plural': 'digest events',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+    ]
@@ -52,3 +52,87 @@ class Subscriber(models.Model):
         verbose_name = 'subscriber'
         verbose_name_plural = 'subscribers'
         unique_together = ["user", "course"]
+
+
+class PendingNotification(models.Model):
+    """
+    Model representing a course-update notification waiting to be sent.
+
+    At most one row exists per course: edits made while a notification is
+    pending are coalesced into it, and the notification is sent once its
+    'due_at' time has passed (see subscribers.services and
+    subscribers.tasks.dispatch_due_notifications).
+
+    Attributes:
+        course (Course): The updated course.
+        due_at (DateTimeField): When the notification should be sent.
+        date_added (DateTimeField): When the first pending edit was made.
+
+    Methods:
+        __str__(): Returns a string representation of the pending
+        notification, including the course and due time.
+    """
+
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='pending_notification'
+    )
+    due_at: datetime = models.DateTimeField(
+        verbose_name='due at',
+        db_index=True
+    )
+    date_added: datetime = models.DateTimeField(
+        verbose_name='creation date',
+        auto_now_add=True
+    )
+
+    def __str__(self):
+        return f'{self.course} - {self.due_at}'
+
+    class Meta:
+        verbose_name = 'pending notification'
+        verbose_name_plural = 'pending notifications'
+
+
+class DigestEvent(models.Model):
+    """
+    Model representing a course update waiting for a user's digest email.
+
+    Users in digest notification mode get one email per digest window
+    instead of one per course update. At most one row exists per user and
+    course, so repeated updates of a course within a window are listed
+    once (see subscribers.tasks.send_course_digests).
+
+    Attributes:
+        user (User): The subscriber to notify.
+        course (Course): The updated course.
+        date_added (DateTimeField): When the first update was recorded.
+
+    Methods:
+        __str__(): Returns a string representation of the event, including
+        the user and the course.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='digest_events'
+    )
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='digest_events'
+    )
+    date_added: datetime = models.DateTimeField(
+        verbose_name='creation date',
+        auto_now_add=True
+    )
+
+    def __str__(self):
+        return f'{self.user} - {self.course}'
+
+    class Meta:
+        verbose_name = 'digest event'
+        verbose_name_plural = 'digest events'
+        unique_together = ["user", "course"]
@@ -44,3 +44,23 @@ class SubscriberSerializer(serializers.ModelSerializer):
             'user',
             'course'
         )
+
+
+class BulkSubscriptionSerializer(serializers.Serializer):
+    """
+    Serializer for the bulk subscription request.
+
+    Attributes:
+        course_ids (list[int]): The IDs of the courses, at most
+        MAX_COURSE_IDS of them.
+        subscribe (bool): Subscribe if true (default), unsubscribe if false.
+    """
+
+    MAX_COURSE_IDS = 1000
+
+    course_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_COURSE_IDS
+    )
+    subscribe = serializers.BooleanField(default=True)
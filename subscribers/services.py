@@ -1,29 +1,231 @@
 import json
-from datetime import timedelta
+from functools import partial
 
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 from django_celery_beat.models import (
-    PeriodicTask,
     CrontabSchedule,
+    PeriodicTask,
 )
+from rest_framework.exceptions import NotFound
+
+from courses.cache import bump_course_version
+from courses.models import Course
+from courses.services import change_course_counter
+from subscribers.models import PendingNotification, Subscriber
+from subscribers.subscriptions import invalidate_subscriptions
+
+LEGACY_NOTIFICATION_TASK = 'subscribers.tasks.course_update_notification'
+LEGACY_NOTIFICATION_PREFIX = 'Notification - course_id: '
+
+
+def schedule_notification(course_id, update_time):
+    """
+    Schedule a notification about a course update.
+
+    All edits of a course within 'COURSE_NOTIFICATION_DELAY' of the first
+    one collapse into a single pending notification: the insert is an
+    'INSERT ... ON CONFLICT DO NOTHING', so while a notification is pending
+    further calls are a no-op. Due notifications are sent by the
+    'dispatch_due_notifications' periodic task.
+
+    Args:
+        course_id (int): The ID of the updated course.
+        update_time (datetime): The time of the update.
+
+    Returns:
+        None
+    """
+    PendingNotification.objects.bulk_create(
+        [
+            PendingNotification(
+                course_id=course_id,
+                due_at=update_time + settings.COURSE_NOTIFICATION_DELAY
+            )
+        ],
+        ignore_conflicts=True
+    )
+
+
+def _lock_courses(course_ids):
+    """
+    Lock the rows of the given courses and return the IDs that exist.
+
+    Every subscription change of a course takes this lock first, so
+    concurrent changes (e.g. a double-clicked toggle) are serialized and
+    the 'subscriber_count' counter always matches the subscription rows.
+    """
+    return set(
+        Course.objects.select_for_update().filter(
+            pk__in=course_ids
+        ).order_by('pk').values_list('pk', flat=True)
+    )
+
+
+def toggle_subscription(user, course_id):
+    """
+    Subscribe a user to a course, or unsubscribe them if subscribed.
+
+    The toggle runs in one transaction: the course row is locked, the
+    subscription is deleted with a single 'DELETE' and, if nothing was
+    deleted, inserted with 'INSERT ... ON CONFLICT DO NOTHING'; the course
+    'subscriber_count' counter is changed by the same transaction.
+
+    Args:
+        user (User): The subscribing user.
+        course_id (int): The ID of the course.
+
+    Returns:
+        bool: True if the user is now subscribed, False if unsubscribed.
 
+    Raises:
+        NotFound: If the course does not exist.
+    """
+    with transaction.atomic():
+        if not _lock_courses([course_id]):
+            raise NotFound('Course not found.')
 
-def schedule_notification(course, update_time):
-    schedule, _ = CrontabSchedule.objects.get_or_create(
-        minute=update_time.minute,
-        hour=update_time.hour + 4,
+        deleted, _ = Subscriber.objects.filter(
+            user=user, course_id=course_id
+        ).delete()
+        if not deleted:
+            Subscriber.objects.bulk_create(
+                [Subscriber(user=user, course_id=course_id)],
+                ignore_conflicts=True
+            )
+        change_course_counter(
+            course_id, 'subscriber_count', -1 if deleted else 1
+        )
+        transaction.on_commit(partial(invalidate_subscriptions, user.pk))
+
+    bump_course_version(course_id)
+    return not deleted
+
+
+def update_subscriptions(user, course_ids, subscribe=True):
+    """
+    Subscribe a user to, or unsubscribe them from, many courses at once.
+
+    The statements do not depend on the number of courses: one lock query,
+    one query for the current subscriptions, one 'bulk_create' (or
+    'DELETE') and one counter 'UPDATE'. Unknown course IDs are ignored, as
+    are courses already in the requested state.
+
+    Args:
+        user (User): The user.
+        course_ids (Iterable[int]): The IDs of the courses.
+        subscribe (bool): Subscribe if True, unsubscribe otherwise.
+
+    Returns:
+        list[int]: The sorted IDs of the courses whose subscription changed.
+    """
+    with transaction.atomic():
+        course_ids = _lock_courses(course_ids)
+        subscribed = set(
+            Subscriber.objects.filter(
+                user=user, course_id__in=course_ids
+            ).values_list('course_id', flat=True)
+        )
+        if subscribe:
+            changed = course_ids - subscribed
+            Subscriber.objects.bulk_create(
+                [
+                    Subscriber(user=user, course_id=course_id)
+                    for course_id in changed
+                ],
+                ignore_conflicts=True
+            )
+        else:
+            changed = subscribed
+            Subscriber.objects.filter(
+                user=user, course_id__in=changed
+            ).delete()
+
+        if changed:
+            transaction.on_commit(partial(invalidate_subscriptions, user.pk))
+            courses = Course.objects.filter(pk__in=changed)
+            if not subscribe:
+                courses = courses.filter(subscriber_count__gte=1)
+            courses.update(
+                subscriber_count=F('subscriber_count') + (
+                    1 if subscribe else -1
+                )
+            )
+
+    if changed:
+        bump_course_version(*changed)
+    return sorted(changed)
+
+
+def reap_legacy_notification_tasks(requeue=False, dry_run=False):
+    """
+    Remove the per-course PeriodicTask rows of the old notification scheme.
+
+    Notifications used to be scheduled as one one-off PeriodicTask and
+    CrontabSchedule per course update; those rows were never removed and
+    made the beat DatabaseScheduler slower with every course. This deletes
+    them, together with the CrontabSchedules they used that no other task
+    uses; unrelated schedules are left alone.
+
+    Args:
+        requeue (bool): Move the tasks that have not run yet to the
+        PendingNotification queue, due now, instead of dropping them.
+        dry_run (bool): Only count the rows that would be removed.
+
+    Returns:
+        dict: The number of 'tasks', 'crontabs' and 'requeued' rows.
+    """
+    tasks = PeriodicTask.objects.filter(
+        task=LEGACY_NOTIFICATION_TASK,
+        name__startswith=LEGACY_NOTIFICATION_PREFIX
     )
-    task = PeriodicTask.objects.filter(
-        name=f'Notification - course_id: {course.pk}'
-    ).first()
-    if task:
-        task.crontab = schedule
-        task.save()
-    else:
-        PeriodicTask.objects.create(
-            crontab=schedule,
-            name=f'Notification - course_id: {course.pk}',
-            task='subscribers.tasks.course_update_notification',
-            args=json.dumps([course.pk]),
-            one_off=True,
-            expires=update_time + timedelta(seconds=30)
+    with transaction.atomic():
+        crontab_ids = set(
+            tasks.filter(crontab__isnull=False).values_list(
+                'crontab_id', flat=True
+            )
         )
+        requeued = []
+        if requeue:
+            course_ids = {
+                json.loads(args)[0]
+                for args in tasks.filter(enabled=True).values_list(
+                    'args', flat=True
+                )
+            }
+            due_at = timezone.now()
+            requeued = [
+                PendingNotification(course_id=course_id, due_at=due_at)
+                for course_id in Course.objects.filter(
+                    pk__in=course_ids
+                ).values_list('pk', flat=True)
+            ]
+
+        if dry_run:
+            return {
+                'tasks': tasks.count(),
+                'crontabs': CrontabSchedule.objects.filter(
+                    pk__in=crontab_ids
+                ).exclude(
+                    periodictask__in=PeriodicTask.objects.exclude(
+                        pk__in=tasks.values('pk')
+                    )
+                ).count(),
+                'requeued': len(requeued),
+            }
+
+        PendingNotification.objects.bulk_create(
+            requeued, ignore_conflicts=True
+        )
+        deleted_tasks, _ = tasks.delete()
+        deleted_crontabs, _ = CrontabSchedule.objects.filter(
+            pk__in=crontab_ids, periodictask__isnull=True
+        ).delete()
+
+    return {
+        'tasks': deleted_tasks,
+        'crontabs': deleted_crontabs,
+        'requeued': len(requeued),
+    }
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db.models import F
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from courses.models import Course
+from subscribers.models import Subscriber
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def update_subscriber_count_on_user_delete(sender, instance, **kwargs):
+    """
+    Decrement Course.subscriber_count for the subscriptions of a user
+    about to be deleted.
+
+    The subscriptions themselves are removed by the cascade; this runs
+    before it, as a single 'UPDATE ... WHERE id IN (SELECT ...)' over all
+    the user's courses. There is no receiver on Subscriber itself, so
+    subscription deletes stay single-statement fast deletes and the
+    subscribe services change the counters explicitly.
+    """
+    Course.objects.filter(
+        pk__in=Subscriber.objects.filter(user=instance).values('course_id'),
+        subscriber_count__gte=1
+    ).update(subscriber_count=F('subscriber_count') - 1)
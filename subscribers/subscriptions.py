@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from subscribers.models import Subscriber
+
+SUBSCRIPTIONS_KEY = 'subscriptions:{user_id}'
+
+
+def _key(user_id):
+    return SUBSCRIPTIONS_KEY.format(user_id=user_id)
+
+
+def get_subscribed_course_ids(user):
+    """
+    Return the IDs of the courses a user is subscribed to.
+
+    The set is read from the cache; on a miss it is loaded with one query
+    and cached for 'SUBSCRIPTION_CACHE_TIMEOUT' seconds. Every change made
+    through subscribers.services drops the cached set.
+
+    Args:
+        user (User): The user; anonymous users have no subscriptions.
+
+    Returns:
+        set: The IDs of the subscribed courses.
+    """
+    if not user.is_authenticated:
+        return set()
+
+    course_ids = cache.get(_key(user.pk))
+    if course_ids is None:
+        course_ids = set(
+            Subscriber.objects.filter(user=user).values_list(
+                'course_id', flat=True
+            )
+        )
+        cache.set(
+            _key(user.pk), course_ids, settings.SUBSCRIPTION_CACHE_TIMEOUT
+        )
+    return course_ids
+
+
+def invalidate_subscriptions(user_id):
+    """
+    Drop the cached subscribed course IDs of a user.
+    """
+    cache.delete(_key(user_id))
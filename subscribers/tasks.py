@@ -1,9 +1,24 @@
+import logging
+from itertools import groupby, islice
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import (
+    EmailMultiAlternatives,
+    get_connection,
+    send_mail,
+)
+from django.db import transaction
+from django.db.models import Max
 from django.urls import reverse
+from django.utils import timezone
+from kombu.exceptions import OperationalError
 
 from courses.models import Course
-from subscribers.models import Subscriber
+from subscribers.models import DigestEvent, PendingNotification, Subscriber
+from users.models import User
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
@@ -17,25 +32,195 @@ def send_notification(recipient_email, message, subject):
     )
 
 
+@shared_task
+def send_notification_batch(recipient_emails, message, subject):
+    """
+    Send the same notification to a batch of recipients.
+
+    Every recipient gets an individual message, but all of them go out
+    over one SMTP connection, so the batch costs a single connection and
+    TLS handshake.
+
+    Returns:
+        int: The number of messages sent.
+    """
+    messages = []
+    for recipient_email in recipient_emails:
+        email = EmailMultiAlternatives(
+            subject=subject, body=message, to=[recipient_email]
+        )
+        email.attach_alternative(message, 'text/html')
+        messages.append(email)
+
+    with get_connection() as connection:
+        return connection.send_messages(messages)
+
+
 @shared_task
 def course_update_notification(course_pk):
-    print('Task activated')
-    course = Course.objects.get(pk=course_pk)
-    users_to_notify = Subscriber.objects.filter(course=course)
-    recipient_email_list = [
-        subscriber.user.email for subscriber in users_to_notify
-    ]
+    """
+    Notify the subscribers of a course that it has been updated.
+
+    The recipient addresses are streamed from the database in one query
+    and sent in batches of 'COURSE_NOTIFICATION_BATCH_SIZE', one
+    'send_notification_batch' task per batch. Subscribers in digest mode
+    get a DigestEvent instead, sent later by 'send_course_digests'.
+    """
+    course = Course.objects.only(
+        'title', 'date_modified'
+    ).get(pk=course_pk)
     subject = f'Course - {course.title} Update Notification'
     message = (
         f'''
-        <p>The course - <strong>{course.title.title()}</strong>, you are subscribed for 
-        is updated recently, at {course.date_modified}.</p>
+        <p>The course - <strong>{course.title.title()}</strong>, you are
+        subscribed for is updated recently, at {course.date_modified}.</p>
         <p>Follow this link to the updated course:
         <a href="{reverse("courses:courses-detail", args=[course.pk])}">
-            {course.pk} - {course.title.title()} 
+            {course.pk} - {course.title.title()}
         </a>
         </p>
         '''
     )
-    for recipient_email in recipient_email_list:
-        send_notification.delay(recipient_email, message, subject)
+    batch_size = settings.COURSE_NOTIFICATION_BATCH_SIZE
+    subscribers = Subscriber.objects.filter(course_id=course_pk)
+    is_digest = {'user__notification_mode': User.NOTIFICATION_MODE_DIGEST}
+
+    digest_user_ids = subscribers.filter(**is_digest).values_list(
+        'user_id', flat=True
+    ).iterator(chunk_size=batch_size)
+    while batch := list(islice(digest_user_ids, batch_size)):
+        DigestEvent.objects.bulk_create(
+            [
+                DigestEvent(user_id=user_id, course_id=course_pk)
+                for user_id in batch
+            ],
+            ignore_conflicts=True
+        )
+
+    recipient_emails = subscribers.exclude(**is_digest).values_list(
+        'user__email', flat=True
+    ).iterator(chunk_size=batch_size)
+
+    while batch := list(islice(recipient_emails, batch_size)):
+        send_notification_batch.delay(batch, message, subject)
+
+
+@shared_task
+def dispatch_due_notifications(batch_size=500):
+    """
+    Send the pending course-update notifications that are due.
+
+    Due rows are claimed with 'SELECT ... FOR UPDATE SKIP LOCKED', so
+    concurrent workers never send the same notification twice. While the
+    rows are still claimed, each notification is queued and only the rows
+    queued successfully are deleted; if the broker is unavailable the rest
+    stay pending for the next run instead of being lost.
+
+    Returns:
+        int: The number of notifications queued.
+    """
+    with transaction.atomic():
+        due = list(
+            PendingNotification.objects.select_for_update(
+                skip_locked=True
+            ).filter(
+                due_at__lte=timezone.now()
+            ).order_by('due_at').values_list('pk', 'course_id')[:batch_size]
+        )
+        queued = []
+        for pk, course_id in due:
+            try:
+                course_update_notification.delay(course_id)
+            except OperationalError:
+                logger.exception(
+                    'Could not queue the notification of course %s',
+                    course_id
+                )
+                break
+            queued.append(pk)
+        PendingNotification.objects.filter(pk__in=queued).delete()
+
+    return len(queued)
+
+
+def build_digest_email(recipient_email, courses):
+    """
+    Build the digest email listing the updated courses of a subscriber.
+
+    Args:
+        recipient_email (str): The subscriber's email address.
+        courses (list[tuple]): '(course_id, title)' pairs.
+
+    Returns:
+        EmailMultiAlternatives: The message.
+    """
+    items = ''.join(
+        f'''
+        <li>
+            <a href="{reverse("courses:courses-detail", args=[course_id])}">
+                {course_id} - {title.title()}
+            </a>
+        </li>'''
+        for course_id, title in courses
+    )
+    message = (
+        f'''
+        <p>{len(courses)} of the courses you are subscribed for were updated
+        recently:</p>
+        <ul>{items}
+        </ul>
+        '''
+    )
+    email = EmailMultiAlternatives(
+        subject='Course Updates Digest', body=message, to=[recipient_email]
+    )
+    email.attach_alternative(message, 'text/html')
+    return email
+
+
+@shared_task
+def send_course_digests(batch_size=None):
+    """
+    Send every digest-mode subscriber one email listing their updates.
+
+    The users with pending events are walked in primary-key order,
+    'COURSE_NOTIFICATION_BATCH_SIZE' users at a time: the events of a batch
+    are read with one query, grouped into one message per user and sent
+    over one SMTP connection, and are deleted as soon as the batch has been
+    sent. If sending fails, the users already emailed are not emailed again
+    by the next run. Only the events that existed when the task started
+    are sent; later ones wait for the next window.
+
+    Returns:
+        int: The number of digest emails sent.
+    """
+    batch_size = batch_size or settings.COURSE_NOTIFICATION_BATCH_SIZE
+    last_id = DigestEvent.objects.aggregate(last_id=Max('id'))['last_id']
+    if last_id is None:
+        return 0
+
+    pending = DigestEvent.objects.filter(id__lte=last_id)
+    sent = 0
+    last_user_id = 0
+    while user_ids := list(
+        pending.filter(user_id__gt=last_user_id).order_by(
+            'user_id'
+        ).values_list('user_id', flat=True).distinct()[:batch_size]
+    ):
+        events = pending.filter(user_id__in=user_ids).order_by(
+            'user_id', 'course_id'
+        ).values_list(
+            'user_id', 'user__email', 'course_id', 'course__title'
+        )
+        batch = [
+            build_digest_email(
+                email, [(course_id, title) for _, _, course_id, title in rows]
+            )
+            for (_, email), rows in groupby(events, key=lambda row: row[:2])
+        ]
+        with get_connection() as connection:
+            sent += connection.send_messages(batch)
+
+        pending.filter(user_id__in=user_ids).delete()
+        last_user_id = user_ids[-1]
+    return sent
@@ -1,9 +1,38 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django_celery_beat.models import (
+    CrontabSchedule,
+    IntervalSchedule,
+    PeriodicTask,
+)
+from kombu.exceptions import OperationalError
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from courses.models import Course
 from users.models import User
-from .models import Subscriber
+from .models import DigestEvent, PendingNotification, Subscriber
+from .services import (
+    reap_legacy_notification_tasks,
+    schedule_notification,
+    toggle_subscription,
+    update_subscriptions,
+)
+from .tasks import (
+    course_update_notification,
+    dispatch_due_notifications,
+    send_course_digests,
+    send_notification_batch,
+)
 
 
 class SubscribeViewTests(APITestCase):
@@ -126,3 +155,541 @@ class SubscribeViewTests(APITestCase):
         response = self.client.post(invalid_url)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_toggle_updates_counter(self):
+        """
+        Test that a subscribe (four statements) and an unsubscribe (three)
+        change the course counter; the savepoint adds two queries.
+        """
+        self.client.force_authenticate(user=self.user)
+        for expected, queries in ((1, 6), (0, 5)):
+            with self.assertNumQueries(queries):
+                self.client.post(self.url)
+            self.course.refresh_from_db()
+            self.assertEqual(self.course.subscriber_count, expected)
+
+
+class BulkSubscribeViewTests(APITestCase):
+    """
+    Test cases for the BulkSubscribeView.
+
+    Methods:
+        test_bulk_subscribe(): Test that the user is subscribed to the new
+        courses only.
+        test_bulk_unsubscribe(): Test that the user is unsubscribed.
+        test_invalid_payload(): Test that an empty list is rejected.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email='user@test.test', password='test'
+        )
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}", description="Description"
+            )
+            for index in range(3)
+        ]
+        Subscriber.objects.create(user=self.user, course=self.courses[0])
+        Course.objects.filter(pk=self.courses[0].pk).update(
+            subscriber_count=1
+        )
+        self.url = reverse("subscribers:subscribe-bulk")
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_subscribe(self):
+        """
+        Test that existing subscriptions and unknown courses are skipped.
+        """
+        course_ids = [course.pk for course in self.courses] + [999]
+        response = self.client.post(
+            self.url, {'course_ids': course_ids}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['course_ids'], course_ids[1:3])
+        self.assertEqual(
+            Subscriber.objects.filter(user=self.user).count(), 3
+        )
+        self.assertEqual(
+            list(Course.objects.order_by('pk').values_list(
+                'subscriber_count', flat=True
+            )),
+            [1, 1, 1]
+        )
+
+    def test_bulk_unsubscribe(self):
+        """
+        Test that only existing subscriptions are removed and counted.
+        """
+        response = self.client.post(
+            self.url,
+            {
+                'course_ids': [course.pk for course in self.courses],
+                'subscribe': False
+            },
+            format='json'
+        )
+
+        self.assertEqual(response.data['course_ids'], [self.courses[0].pk])
+        self.assertFalse(Subscriber.objects.exists())
+        self.assertEqual(
+            Course.objects.filter(subscriber_count=0).count(), 3
+        )
+
+    def test_invalid_payload(self):
+        """
+        Test that an empty course list is a validation error.
+        """
+        response = self.client.post(
+            self.url, {'course_ids': []}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SubscriptionStatementTests(TestCase):
+    """
+    Test cases for the statement cost of the subscription services.
+
+    Methods:
+        test_toggle_statements(): Test that a toggle runs a fixed set of
+        statements in both directions.
+        test_bulk_unsubscribe_statements(): Test that a bulk unsubscribe
+        costs the same for one course and for many.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create(
+            email='user@test.test', password='test'
+        )
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}", description="Description"
+            )
+            for index in range(3)
+        ]
+
+    def capture(self, function, *args, **kwargs):
+        """
+        Run a service and return the first word of every statement it
+        executed, leaving out the savepoints of the test transaction.
+        """
+        with CaptureQueriesContext(connection) as context:
+            function(*args, **kwargs)
+        return [
+            query['sql'].split(None, 1)[0].upper()
+            for query in context.captured_queries
+            if not query['sql'].upper().startswith(('SAVEPOINT', 'RELEASE'))
+        ]
+
+    def test_toggle_statements(self):
+        """
+        Test that subscribing locks, tries the 'DELETE', inserts and
+        counts, and that unsubscribing only locks, deletes and counts.
+        """
+        course_id = self.courses[0].pk
+
+        self.assertEqual(
+            self.capture(toggle_subscription, self.user, course_id),
+            ['SELECT', 'DELETE', 'INSERT', 'UPDATE']
+        )
+        self.assertEqual(
+            self.capture(toggle_subscription, self.user, course_id),
+            ['SELECT', 'DELETE', 'UPDATE']
+        )
+
+    def test_bulk_unsubscribe_statements(self):
+        """
+        Test that unsubscribing from one course and from three courses run
+        the same four statements.
+        """
+        expected = ['SELECT', 'SELECT', 'DELETE', 'UPDATE']
+        for courses in (self.courses[:1], self.courses):
+            course_ids = [course.pk for course in courses]
+            update_subscriptions(self.user, course_ids)
+
+            self.assertEqual(
+                self.capture(
+                    update_subscriptions, self.user, course_ids,
+                    subscribe=False
+                ),
+                expected
+            )
+        self.assertEqual(
+            Course.objects.filter(subscriber_count=0).count(), 3
+        )
+
+
+@override_settings(COURSE_NOTIFICATION_DELAY=timedelta(hours=4))
+class CourseNotificationSchedulerTests(APITestCase):
+    """
+    Test cases for the coalescing course-update notification scheduler.
+
+    Methods:
+        test_updates_coalesce(): Test that repeated updates of a course
+        leave a single pending notification due after the first one.
+        test_due_time_crosses_midnight(): Test that an update late in the
+        day is due on the next day.
+        test_dispatch_sends_due_notifications_once(): Test that only due
+        notifications are sent, and each of them once.
+        test_dispatch_keeps_unqueued_notifications(): Test that a broker
+        error leaves the notifications it did not queue pending.
+    """
+
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+
+    def test_updates_coalesce(self):
+        """
+        Test that repeated updates of a course leave a single pending
+        notification, due one window after the first update.
+        """
+        first = timezone.now()
+        for minutes in range(5):
+            schedule_notification(
+                self.course.pk, first + timedelta(minutes=minutes)
+            )
+
+        pending = PendingNotification.objects.get()
+        self.assertEqual(pending.course_id, self.course.pk)
+        self.assertEqual(pending.due_at, first + timedelta(hours=4))
+
+    def test_due_time_crosses_midnight(self):
+        """
+        Test that an update at 22:30 is due at 02:30 on the next day.
+        """
+        update_time = timezone.now().replace(
+            hour=22, minute=30, second=0, microsecond=0
+        )
+        schedule_notification(self.course.pk, update_time)
+
+        pending = PendingNotification.objects.get()
+        self.assertEqual(pending.due_at, update_time + timedelta(hours=4))
+        self.assertEqual(pending.due_at.hour, 2)
+
+    def test_dispatch_sends_due_notifications_once(self):
+        """
+        Test that the dispatch task sends only the due notifications,
+        removes them and leaves the others pending.
+        """
+        other = Course.objects.create(
+            title="Other Course", description="Other Course Description"
+        )
+        schedule_notification(
+            self.course.pk, timezone.now() - timedelta(hours=5)
+        )
+        schedule_notification(other.pk, timezone.now())
+
+        with mock.patch(
+            'subscribers.tasks.course_update_notification.delay'
+        ) as delay:
+            dispatch_due_notifications()
+            dispatch_due_notifications()
+
+        delay.assert_called_once_with(self.course.pk)
+        self.assertEqual(
+            list(PendingNotification.objects.values_list(
+                'course_id', flat=True
+            )),
+            [other.pk]
+        )
+
+    def test_dispatch_keeps_unqueued_notifications(self):
+        """
+        Test that when queueing fails, the notifications queued before the
+        failure are removed and the others stay pending.
+        """
+        other = Course.objects.create(
+            title="Other Course", description="Other Course Description"
+        )
+        schedule_notification(
+            self.course.pk, timezone.now() - timedelta(hours=6)
+        )
+        schedule_notification(other.pk, timezone.now() - timedelta(hours=5))
+
+        with mock.patch(
+            'subscribers.tasks.course_update_notification.delay',
+            side_effect=[None, OperationalError('broker down')]
+        ), self.assertLogs('subscribers.tasks', 'ERROR'):
+            queued = dispatch_due_notifications()
+
+        self.assertEqual(queued, 1)
+        self.assertEqual(
+            list(PendingNotification.objects.values_list(
+                'course_id', flat=True
+            )),
+            [other.pk]
+        )
+
+
+@override_settings(COURSE_NOTIFICATION_BATCH_SIZE=2)
+class CourseUpdateNotificationTests(APITestCase):
+    """
+    Test cases for the batched course-update notification e-mails.
+
+    Methods:
+        test_recipients_are_sent_in_batches(): Test that the subscribers
+        are read in one query and notified in batches.
+        test_batch_uses_one_connection(): Test that a batch is sent over a
+        single mail connection.
+    """
+
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+        for index in range(5):
+            user = User.objects.create(
+                email=f'user{index}@test.test', password='test'
+            )
+            Subscriber.objects.create(user=user, course=self.course)
+
+    def test_recipients_are_sent_in_batches(self):
+        """
+        Test that the task reads the course, the digest subscribers and
+        the recipient addresses in three queries and queues one batch per
+        two recipients.
+        """
+        with mock.patch(
+            'subscribers.tasks.send_notification_batch.delay',
+            side_effect=send_notification_batch
+        ) as delay, self.assertNumQueries(3):
+            course_update_notification(self.course.pk)
+
+        self.assertEqual(delay.call_count, 3)
+        self.assertEqual(
+            sorted(email.to[0] for email in mail.outbox),
+            [f'user{index}@test.test' for index in range(5)]
+        )
+        self.assertTrue(all(len(email.to) == 1 for email in mail.outbox))
+
+    def test_batch_uses_one_connection(self):
+        """
+        Test that all messages of a batch share one connection.
+        """
+        with mock.patch(
+            'subscribers.tasks.get_connection',
+            wraps=mail.get_connection
+        ) as get_connection:
+            sent = send_notification_batch(
+                ['a@test.test', 'b@test.test'], '<p>Update</p>', 'Update'
+            )
+
+        self.assertEqual(sent, 2)
+        get_connection.assert_called_once_with()
+        self.assertEqual(mail.outbox[0].alternatives[0][1], 'text/html')
+
+
+@override_settings(COURSE_NOTIFICATION_BATCH_SIZE=2)
+class CourseDigestTests(APITestCase):
+    """
+    Test cases for the digest notification mode.
+
+    Methods:
+        test_digest_users_get_no_immediate_mail(): Test that course updates
+        are recorded for digest users instead of mailed.
+        test_repeated_updates_coalesce(): Test that a course updated twice
+        is listed once.
+        test_send_course_digests(): Test that every digest user gets one
+        email listing their updated courses.
+        test_failed_batch_is_resent_alone(): Test that after a failed batch
+        only the users not yet emailed are emailed again.
+    """
+
+    def setUp(self):
+        self.courses = [
+            Course.objects.create(
+                title=f"Course {index}", description="Description"
+            )
+            for index in range(2)
+        ]
+        self.immediate_user = User.objects.create(
+            email='immediate@test.test', password='test'
+        )
+        self.digest_users = [
+            User.objects.create(
+                email=f'digest{index}@test.test',
+                password='test',
+                notification_mode=User.NOTIFICATION_MODE_DIGEST
+            )
+            for index in range(3)
+        ]
+        for course in self.courses:
+            for user in [self.immediate_user, *self.digest_users]:
+                Subscriber.objects.create(user=user, course=course)
+
+    def notify(self, course):
+        with mock.patch(
+            'subscribers.tasks.send_notification_batch.delay',
+            side_effect=send_notification_batch
+        ):
+            course_update_notification(course.pk)
+
+    def test_digest_users_get_no_immediate_mail(self):
+        """
+        Test that only the immediate subscriber is mailed on an update.
+        """
+        self.notify(self.courses[0])
+
+        self.assertEqual(
+            [email.to for email in mail.outbox], [['immediate@test.test']]
+        )
+        self.assertEqual(
+            DigestEvent.objects.filter(course=self.courses[0]).count(), 3
+        )
+
+    def test_repeated_updates_coalesce(self):
+        """
+        Test that repeated updates of a course leave one event per user.
+        """
+        self.notify(self.courses[0])
+        self.notify(self.courses[0])
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(DigestEvent.objects.count(), 3)
+
+    def test_send_course_digests(self):
+        """
+        Test that each digest user gets one email listing both courses,
+        sent two per connection, and that the events are cleared.
+        """
+        for course in self.courses:
+            self.notify(course)
+        mail.outbox.clear()
+
+        with mock.patch(
+            'subscribers.tasks.get_connection',
+            wraps=mail.get_connection
+        ) as get_connection:
+            sent = send_course_digests()
+
+        self.assertEqual(sent, 3)
+        self.assertEqual(get_connection.call_count, 2)
+        self.assertEqual(
+            sorted(email.to[0] for email in mail.outbox),
+            [user.email for user in self.digest_users]
+        )
+        for email in mail.outbox:
+            for course in self.courses:
+                self.assertIn(
+                    reverse('courses:courses-detail', args=[course.pk]),
+                    email.body
+                )
+        self.assertFalse(DigestEvent.objects.exists())
+        self.assertEqual(send_course_digests(), 0)
+
+    def test_failed_batch_is_resent_alone(self):
+        """
+        Test that when the second batch fails, the events of the first one
+        are already gone, so the next run emails only the remaining user.
+        """
+        for course in self.courses:
+            self.notify(course)
+        mail.outbox.clear()
+
+        with mock.patch(
+            'subscribers.tasks.get_connection',
+            side_effect=[mail.get_connection(), SMTPException('timeout')]
+        ), self.assertRaises(SMTPException):
+            send_course_digests()
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            set(DigestEvent.objects.values_list('user_id', flat=True)),
+            {self.digest_users[2].pk}
+        )
+
+        self.assertEqual(send_course_digests(), 1)
+        self.assertEqual(mail.outbox[-1].to, [self.digest_users[2].email])
+
+
+class LegacyNotificationReaperTests(APITestCase):
+    """
+    Test cases for removing the PeriodicTask rows of the old notification
+    scheduler.
+
+    Methods:
+        test_dry_run_keeps_rows(): Test that a dry run only counts rows.
+        test_reaps_legacy_rows(): Test that the per-course tasks and the
+        crontabs only they used are removed and other beat entries are
+        kept.
+        test_requeue(): Test that pending tasks move to the new queue.
+    """
+
+    def setUp(self):
+        self.course = Course.objects.create(
+            title="Test Course", description="Test Course Description"
+        )
+        self.shared = CrontabSchedule.objects.create(minute=0, hour=3)
+        PeriodicTask.objects.create(
+            crontab=self.shared,
+            name='nightly-report',
+            task='payments.tasks.process_stripe_events'
+        )
+        crontabs = [
+            CrontabSchedule.objects.create(minute=0, hour=4), self.shared
+        ]
+        for crontab, course_id in zip(crontabs, [self.course.pk, 999999]):
+            PeriodicTask.objects.create(
+                crontab=crontab,
+                name=f'Notification - course_id: {course_id}',
+                task='subscribers.tasks.course_update_notification',
+                args=f'[{course_id}]',
+                one_off=True
+            )
+        PeriodicTask.objects.create(
+            interval=IntervalSchedule.objects.create(
+                every=1, period=IntervalSchedule.DAYS
+            ),
+            name='user-deactivation',
+            task='users.tasks.activity_check'
+        )
+        self.unused = CrontabSchedule.objects.create(minute=30, hour=12)
+
+    def test_dry_run_keeps_rows(self):
+        """
+        Test that '--dry-run' reports the rows and deletes nothing.
+        """
+        out = StringIO()
+        call_command('reap_notification_tasks', '--dry-run', stdout=out)
+
+        self.assertIn('Would remove 2 tasks and 1 crontab', out.getvalue())
+        self.assertEqual(PeriodicTask.objects.count(), 4)
+        self.assertEqual(CrontabSchedule.objects.count(), 3)
+
+    def test_reaps_legacy_rows(self):
+        """
+        Test that the legacy tasks and the crontabs only they used are
+        deleted, while shared and unrelated crontabs are kept.
+        """
+        counts = reap_legacy_notification_tasks()
+
+        self.assertEqual(
+            counts, {'tasks': 2, 'crontabs': 1, 'requeued': 0}
+        )
+        self.assertEqual(
+            set(PeriodicTask.objects.values_list('name', flat=True)),
+            {'nightly-report', 'user-deactivation'}
+        )
+        self.assertEqual(
+            set(CrontabSchedule.objects.all()), {self.shared, self.unused}
+        )
+        self.assertFalse(PendingNotification.objects.exists())
+
+    def test_requeue(self):
+        """
+        Test that enabled tasks of existing courses are queued as pending
+        notifications.
+        """
+        counts = reap_legacy_notification_tasks(requeue=True)
+
+        self.assertEqual(counts['requeued'], 1)
+        self.assertEqual(
+            list(PendingNotification.objects.values_list(
+                'course_id', flat=True
+            )),
+            [self.course.pk]
+        )
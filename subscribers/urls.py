@@ -18,7 +18,7 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from subscribers.apps import SubscribersConfig
-from subscribers.views import SubscribeView
+from subscribers.views import BulkSubscribeView, SubscribeView
 
 app_name = SubscribersConfig.name
 
@@ -30,4 +30,9 @@ urlpatterns = [
                       SubscribeView.as_view(),
                       name='subscribe'
                   ),
+                  path(
+                      'courses/',
+                      BulkSubscribeView.as_view(),
+                      name='subscribe-bulk'
+                  ),
               ] + router.urls
@@ -2,8 +2,8 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Subscriber
-from .serializers import SubscriberSerializer
+from .serializers import BulkSubscriptionSerializer
+from .services import toggle_subscription, update_subscriptions
 
 
 class SubscribeView(APIView):
@@ -46,25 +46,57 @@ class SubscribeView(APIView):
         Usage:
             - Use this method to subscribe or unsubscribe users from a
             specific course.
+
+        Note:
+            - The toggle is one transaction of at most four statements
+            (see subscribers.services.toggle_subscription), including the
+            course 'subscriber_count' counter change.
         """
-        user = request.user
-        try:
-            subscriber = Subscriber.objects.get(user=user, course=course_id)
-            subscriber.delete()
+        if toggle_subscription(request.user, course_id):
             return Response(
-                {"message": "Unsubscribed successfully"},
-                status=status.HTTP_200_OK
-            )
-        except Subscriber.DoesNotExist:
-            serializer = SubscriberSerializer(
-                data={"user": user.pk, "course": course_id}
-            )
-            if serializer.is_valid():
-                serializer.save()
-                return Response(
-                    {"message": "Subscribed successfully"},
-                    status=status.HTTP_201_CREATED
-                )
-            return Response(
-                serializer.errors, status=status.HTTP_404_NOT_FOUND
+                {"message": "Subscribed successfully"},
+                status=status.HTTP_201_CREATED
             )
+        return Response(
+            {"message": "Unsubscribed successfully"},
+            status=status.HTTP_200_OK
+        )
+
+
+class BulkSubscribeView(APIView):
+    """
+    View for subscribing to or unsubscribing from many courses at once.
+
+    HTTP Methods:
+        - POST: Subscribes the user to, or unsubscribes them from, every
+        listed course.
+
+    Methods:
+        post(request): Handles the POST request.
+
+    Example:
+        POST /subscribe/courses/
+        {"course_ids": [1, 2, 3], "subscribe": true}
+    """
+
+    def post(self, request):
+        """
+        Handle POST request to change the subscriptions of many courses.
+
+        Args:
+            request (Request): The HTTP request object with 'course_ids'
+            and an optional 'subscribe' flag (default true).
+
+        Returns:
+            Response: 'course_ids' of the courses whose subscription was
+            changed; unknown courses and courses already in the requested
+            state are left out.
+        """
+        serializer = BulkSubscriptionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changed = update_subscriptions(
+            request.user,
+            serializer.validated_data['course_ids'],
+            subscribe=serializer.validated_data['subscribe']
+        )
+        return Response({'course_ids': changed}, status=status.HTTP_200_OK)
@@ -0,0 +1,108 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_KEY = 'auth:user:{user_id}'
+
+
+def _key(user_id):
+    return USER_KEY.format(user_id=user_id)
+
+
+def invalidate_cached_users(*user_ids):
+    """
+    Drop the cached principals of the given users.
+
+    Called whenever a user is saved or deleted (see users.signals) and for
+    the users deactivated in bulk by users.tasks.activity_check.
+    """
+    cache.delete_many([_key(user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that reads the user from the cache.
+
+    The user of a valid token is cached by ID for 'AUTH_USER_CACHE_TIMEOUT'
+    seconds, so authenticated requests do not look the user up in the
+    database. The entry is dropped whenever the user changes; the
+    'is_active' and revoked-token checks of JWTAuthentication still run
+    against the cached user.
+
+    The password hash is never cached: the cached user has a deferred
+    'password' field, and with 'CHECK_REVOKE_TOKEN' only the digest the
+    tokens carry is stored next to it.
+
+    Usage:
+        - Set as the default authentication class in 'REST_FRAMEWORK'.
+    """
+
+    def cache_user(self, user):
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != 'password'
+        }
+        revoke_hash = None
+        if api_settings.CHECK_REVOKE_TOKEN:
+            revoke_hash = get_md5_hash_password(user.password)
+        cache.set(
+            _key(user.pk),
+            (values, revoke_hash),
+            settings.AUTH_USER_CACHE_TIMEOUT
+        )
+        return revoke_hash
+
+    def get_cached_user(self, user_id):
+        cached = cache.get(_key(user_id))
+        if cached is None:
+            return None, None
+        values, revoke_hash = cached
+        user = self.user_model.from_db(
+            DEFAULT_DB_ALIAS, list(values), list(values.values())
+        )
+        return user, revoke_hash
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+
+        user, revoke_hash = self.get_cached_user(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                )
+            revoke_hash = self.cache_user(user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != revoke_hash:
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."),
+                    code="password_changed"
+                )
+
+        return user
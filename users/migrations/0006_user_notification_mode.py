@@ -0,0 +1,18 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_alter_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notification_mode',
+            field=models.CharField(choices=[('immediate', 'Immediate'), ('digest', 'Digest')], default='immediate', max_length=20, verbose_name='notification mode'),
+        ),
+    ]
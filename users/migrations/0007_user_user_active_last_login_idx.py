@@ -0,0 +1,17 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_user_notification_mode'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['is_active', 'last_login'], name='user_active_last_login_idx'),
+        ),
+    ]
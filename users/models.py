@@ -22,6 +22,8 @@ class User(AbstractUser):
         city (CharField): The user's city.
         is_verified (BooleanField): Indicates whether the user's email is
         verified.
+        notification_mode (CharField): How course-update notifications are
+        sent: one email per update, or a periodic digest of all updates.
         date_added (DateTimeField): The date when the user account was created.
         date_modified (DateTimeField): The date when the user account was
         last modified.
@@ -49,6 +51,14 @@ class User(AbstractUser):
         ```
     """
 
+    NOTIFICATION_MODE_IMMEDIATE = 'immediate'
+    NOTIFICATION_MODE_DIGEST = 'digest'
+
+    NOTIFICATION_MODES = (
+        (NOTIFICATION_MODE_IMMEDIATE, 'Immediate'),
+        (NOTIFICATION_MODE_DIGEST, 'Digest'),
+    )
+
     username = None
     email = models.EmailField(
         unique=True, verbose_name='email', validators=[
@@ -79,6 +89,12 @@ class User(AbstractUser):
         verbose_name='is verified',
         default=False
     )
+    notification_mode = models.CharField(
+        max_length=20,
+        verbose_name='notification mode',
+        choices=NOTIFICATION_MODES,
+        default=NOTIFICATION_MODE_IMMEDIATE
+    )
     date_added: datetime = models.DateTimeField(
         verbose_name='creation date',
         auto_now_add=True
@@ -109,3 +125,9 @@ class User(AbstractUser):
         verbose_name = 'user'
         verbose_name_plural = 'users'
         ordering = ('date_added',)
+        indexes = [
+            models.Index(
+                fields=['is_active', 'last_login'],
+                name='user_active_last_login_idx'
+            ),
+        ]
@@ -0,0 +1,21 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class UsersPaginator(PageNumberPagination):
+    """
+    Paginator for the list of users.
+
+    Attributes:
+        page_size (int): The default number of users to include on each page.
+        page_size_query_param (str): The query parameter used to specify the
+        number of items per page.
+        max_page_size (int): The maximum number of users per page that a
+        client can request.
+
+    Usage:
+        - Use this paginator class with the users list view.
+    """
+
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
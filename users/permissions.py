@@ -1,6 +1,6 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
-from payments.models import Payment
+from payments.entitlements import has_entitlement
 
 
 class IsOwnerOrManager(BasePermission):
@@ -69,8 +69,13 @@ class IsPayed(BasePermission):
         message (str): A message to be returned when permission is denied.
 
     Methods:
-        has_permission(request, view): Check if the user has permission to
-        perform the requested action.
+        has_permission(request, view): Check if the user is authenticated
+        and the request is read-only.
+        has_object_permission(request, view, obj): Check if the user has
+        paid for the object (for a lesson, the lesson or its course),
+        using the cached entitlements of the user (see
+        payments.entitlements), so the check costs no query once the
+        entitlements are cached.
 
     Usage:
         - Use this permission class to control access to content based on
@@ -84,32 +89,18 @@ class IsPayed(BasePermission):
         ```
     """
 
-    message = ""
+    message = "You are allowed to access only paid content"
 
     def has_permission(self, request, view):
-        if request.user.is_authenticated:
-            if request.method not in SAFE_METHODS:
-                return False
-
-            if request.user.is_staff:
-                return True
+        return bool(
+            request.user.is_authenticated
+            and request.method in SAFE_METHODS
+        )
 
-            obj_model = view.get_object().__class__.__name__.lower()
-            view_obj = view.get_object()
-
-            payment_filter = {
-                obj_model: view_obj,
-                'user': request.user
-            }
-            item = Payment.objects.filter(
-                **payment_filter
-            ).first()
-
-            if item:
-                return True
-
-        self.message = "You are allowed to access only paid content"
-        return False
+    def has_object_permission(self, request, view, obj):
+        if request.user.is_staff:
+            return True
+        return has_entitlement(request.user.pk, obj)
 
 
 class IsOwnerOrReadOnly(BasePermission):
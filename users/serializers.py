@@ -1,3 +1,4 @@
+from django.utils.functional import cached_property
 from rest_framework import serializers
 
 from payments.serializers import PaymentsSerializer
@@ -19,7 +20,9 @@ class UserSerializer(serializers.ModelSerializer):
 
     Methods:
         to_representation(instance): Custom method to conditionally include
-        or exclude fields based on the request user.
+        or exclude fields based on the request user; other users are
+        rendered with PublicUserSerializer, so their payments are never
+        read.
 
     Usage:
         - Use this serializer to convert User model instances into JSON data
@@ -45,6 +48,7 @@ class UserSerializer(serializers.ModelSerializer):
                     'image',
                     'country',
                     'city',
+                    'notification_mode',
                     'payments',
                 )
         ```
@@ -64,18 +68,45 @@ class UserSerializer(serializers.ModelSerializer):
             'image',
             'country',
             'city',
+            'notification_mode',
             'payments',
         )
 
+    @cached_property
+    def public_serializer(self):
+        return PublicUserSerializer(context=self.context)
+
     def to_representation(self, instance):
         user = self.context['request'].user
-        is_owner = user == instance
-        data = super().to_representation(instance)
+        if user != instance:
+            return self.public_serializer.to_representation(instance)
+        return super().to_representation(instance)
 
-        if not is_owner:
-            data.pop('payments', None)
-            data.pop('last_name', None)
-        return data
+
+class PublicUserSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the fields of a user that other users may see.
+
+    Attributes:
+        model (User): The model class that this serializer is associated with.
+        fields (tuple): The fields to include in the serialized representation.
+
+    Note:
+        - Only the columns listed in 'fields' are read, so it can render
+        users loaded with a narrow 'only()' queryset (see UserListView).
+    """
+
+    class Meta:
+        model = User
+        fields = (
+            'pk',
+            'email',
+            'first_name',
+            'telephone',
+            'image',
+            'country',
+            'city',
+        )
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,111 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from users.authentication import invalidate_cached_users
+from users.models import User
+
+logger = logging.getLogger(__name__)
+
+DEACTIVATION_CHECKPOINT_KEY = 'users:deactivation:checkpoint'
+
+
+def get_inactive_users(due_date, include_never_logged_in=False):
+    """
+    Return the active users who have not logged in since 'due_date'.
+
+    Args:
+        due_date (datetime): The last login time that counts as inactive.
+        include_never_logged_in (bool): Also return users who never logged
+        in and were created before 'due_date'.
+
+    Returns:
+        QuerySet: The inactive users.
+    """
+    inactive = Q(last_login__lte=due_date)
+    if include_never_logged_in:
+        inactive |= Q(last_login__isnull=True, date_added__lte=due_date)
+    return User.objects.filter(inactive, is_active=True)
+
+
+def deactivate_inactive_users(batch_size=None, include_never_logged_in=None):
+    """
+    Deactivate the users who have not logged in for a while.
+
+    The users are swept in primary-key order, 'batch_size' at a time: each
+    batch is one short 'UPDATE' of at most 'batch_size' rows. After every
+    finished batch its last primary key and the sweep's cutoff date are
+    stored as a checkpoint that expires after
+    'USER_DEACTIVATION_CHECKPOINT_TIMEOUT' seconds, so a sweep interrupted
+    shortly before resumes where it stopped, with the same cutoff, while
+    the checkpoint of an abandoned sweep expires and the next sweep starts
+    over from the first user. Every batch is logged with its size, the
+    number of deactivated users and its duration. The cached principals of
+    the batch are dropped, so the deactivated users are rejected on their
+    next request.
+
+    Args:
+        batch_size (int): Users per batch (default
+        'USER_DEACTIVATION_BATCH_SIZE').
+        include_never_logged_in (bool): Also deactivate users who never
+        logged in, by their creation date (default
+        'USER_DEACTIVATION_INCLUDE_NEVER_LOGGED_IN').
+
+    Returns:
+        dict: The number of 'batches' and of 'deactivated' users.
+    """
+    if batch_size is None:
+        batch_size = settings.USER_DEACTIVATION_BATCH_SIZE
+    if include_never_logged_in is None:
+        include_never_logged_in = (
+            settings.USER_DEACTIVATION_INCLUDE_NEVER_LOGGED_IN
+        )
+
+    checkpoint = cache.get(DEACTIVATION_CHECKPOINT_KEY)
+    if checkpoint is None:
+        last_pk = 0
+        due_date = timezone.now() - settings.USER_INACTIVITY_PERIOD
+    else:
+        last_pk, due_date = checkpoint
+        logger.info('Resuming user deactivation after pk %s', last_pk)
+    users = get_inactive_users(due_date, include_never_logged_in)
+
+    batches = deactivated = 0
+    while True:
+        started = time.monotonic()
+        user_ids = list(
+            users.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )[:batch_size]
+        )
+        if not user_ids:
+            break
+
+        count = users.filter(pk__in=user_ids).update(is_active=False)
+        invalidate_cached_users(*user_ids)
+        last_pk = user_ids[-1]
+        cache.set(
+            DEACTIVATION_CHECKPOINT_KEY,
+            (last_pk, due_date),
+            settings.USER_DEACTIVATION_CHECKPOINT_TIMEOUT
+        )
+
+        batches += 1
+        deactivated += count
+        logger.info(
+            'User deactivation batch %s: %s selected, %s deactivated, '
+            'last pk %s, %.3f s',
+            batches, len(user_ids), count, last_pk,
+            time.monotonic() - started
+        )
+
+    cache.delete(DEACTIVATION_CHECKPOINT_KEY)
+    logger.info(
+        'User deactivation finished: %s users in %s batches',
+        deactivated, batches
+    )
+    return {'batches': batches, 'deactivated': deactivated}
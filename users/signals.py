@@ -0,0 +1,22 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.authentication import invalidate_cached_users
+from users.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Drop the cached principal of a changed or deleted user.
+
+    Covers profile updates (UsersUpdateView), password changes and the
+    'last_login' update on sign-in. The entry is dropped after the
+    transaction commits, so a concurrent request cannot cache the old row
+    again.
+    """
+    transaction.on_commit(partial(invalidate_cached_users, instance.pk))
@@ -1,13 +1,13 @@
-from datetime import timedelta
-
 from celery import shared_task
-from django.utils import timezone
 
-from users.models import User
+from users.services import deactivate_inactive_users
 
 
 @shared_task
-def activity_check():
-    due_date = timezone.now() - timedelta(days=30)
-    queryset = User.objects.filter(last_login__lte=due_date)
-    queryset.update(is_active=False)
+def activity_check(batch_size=None, include_never_logged_in=None):
+    """
+    Deactivate the users who have not logged in for
+    'USER_INACTIVITY_PERIOD', in batches (see
+    users.services.deactivate_inactive_users).
+    """
+    return deactivate_inactive_users(batch_size, include_never_logged_in)
@@ -1,3 +1,290 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from courses.models import Course
+from payments.models import Payment
+
+from users.authentication import USER_KEY
+from users.models import User
+from users.services import (
+    DEACTIVATION_CHECKPOINT_KEY,
+    deactivate_inactive_users,
+)
+from users.tasks import activity_check
+
+
+@override_settings(USER_INACTIVITY_PERIOD=timedelta(days=30))
+class ActivityCheckTests(TestCase):
+    """
+    Test cases for the batched user deactivation sweep.
+
+    Methods:
+        test_inactive_users_are_deactivated_in_batches(): Test that only
+        the inactive users are deactivated, a batch at a time.
+        test_never_logged_in_users(): Test that users who never logged in
+        are deactivated only when asked for.
+        test_resume_from_checkpoint(): Test that an interrupted sweep
+        continues after the stored checkpoint and clears it.
+        test_checkpoint_expires(): Test that the checkpoint is stored with
+        a timeout.
+    """
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.inactive = [
+            User.objects.create(
+                email=f'inactive{index}@test.test',
+                last_login=now - timedelta(days=31 + index)
+            )
+            for index in range(5)
+        ]
+        self.recent = User.objects.create(
+            email='recent@test.test', last_login=now - timedelta(days=1)
+        )
+        self.never_logged_in = User.objects.create(email='new@test.test')
+        User.objects.filter(pk=self.never_logged_in.pk).update(
+            date_added=now - timedelta(days=60)
+        )
+
+    def active_emails(self):
+        return set(
+            User.objects.filter(is_active=True).values_list(
+                'email', flat=True
+            )
+        )
+
+    def test_inactive_users_are_deactivated_in_batches(self):
+        """
+        Test that five inactive users are deactivated in three batches of
+        at most two.
+        """
+        with self.assertLogs('users.services', 'INFO') as logs:
+            result = activity_check(batch_size=2)
+
+        self.assertEqual(result, {'batches': 3, 'deactivated': 5})
+        self.assertEqual(
+            self.active_emails(), {'recent@test.test', 'new@test.test'}
+        )
+        self.assertEqual(
+            sum('User deactivation batch' in line for line in logs.output), 3
+        )
+
+    def test_never_logged_in_users(self):
+        """
+        Test that an old account without a login is deactivated with
+        'include_never_logged_in'.
+        """
+        result = activity_check(include_never_logged_in=True)
+
+        self.assertEqual(result, {'batches': 1, 'deactivated': 6})
+        self.assertEqual(self.active_emails(), {'recent@test.test'})
+
+    def test_resume_from_checkpoint(self):
+        """
+        Test that the users up to the checkpoint are skipped once.
+        """
+        cache.set(
+            DEACTIVATION_CHECKPOINT_KEY,
+            (self.inactive[2].pk, timezone.now() - timedelta(days=30)),
+            60
+        )
+
+        result = deactivate_inactive_users(batch_size=10)
+
+        self.assertEqual(result['deactivated'], 2)
+        self.assertIsNone(cache.get(DEACTIVATION_CHECKPOINT_KEY))
+        self.assertEqual(deactivate_inactive_users()['deactivated'], 3)
+
+    @override_settings(USER_DEACTIVATION_CHECKPOINT_TIMEOUT=60)
+    def test_checkpoint_expires(self):
+        """
+        Test that every checkpoint is written with the configured timeout,
+        so the checkpoint of an abandoned sweep cannot outlive it.
+        """
+        with mock.patch('users.services.cache', wraps=cache) as wrapped:
+            deactivate_inactive_users(batch_size=2)
+
+        self.assertEqual(
+            [call.args[2] for call in wrapped.set.call_args_list],
+            [60, 60, 60]
+        )
+
+
+class UserListViewTests(APITestCase):
+    """
+    Test cases for the paginated UserListView.
+
+    Methods:
+        test_other_users_are_public(): Test that other users are rendered
+        without their private fields and payments.
+        test_payments_are_read_for_requester_only(): Test that the page
+        costs the same number of queries whatever other users have paid.
+    """
+
+    def setUp(self):
+        self.course = Course.objects.create(
+            title='Course', description='Description'
+        )
+        self.users = [
+            User.objects.create(
+                email=f'user{index}@test.test', last_name='Last'
+            )
+            for index in range(3)
+        ]
+        for user in self.users:
+            Payment.objects.create(
+                user=user, course=self.course, paid_price=100
+            )
+        self.user = self.users[0]
+        self.url = reverse('users:users-list')
+        self.client.force_authenticate(user=self.user)
+
+    def test_other_users_are_public(self):
+        """
+        Test that only the requester's row has payments and private fields.
+        """
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        rows = {row['pk']: row for row in response.data['results']}
+        own = rows.pop(self.user.pk)
+        self.assertEqual(len(own['payments']), 1)
+        self.assertEqual(own['last_name'], 'Last')
+        for row in rows.values():
+            self.assertNotIn('payments', row)
+            self.assertNotIn('last_name', row)
+            self.assertNotIn('notification_mode', row)
+
+    def test_payments_are_read_for_requester_only(self):
+        """
+        Test that a page costs a count query, the page query and one
+        payments query, however many other users have payments.
+        """
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+
+        self.client.force_authenticate(user=self.users[1])
+        with self.assertNumQueries(2):
+            self.client.get(self.url, {'page_size': 1})
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    """
+    Test cases for the cached JWT user principal.
+
+    Methods:
+        test_user_is_read_once(): Test that repeated requests skip the user
+        lookup.
+        test_update_invalidates(): Test that a profile update drops the
+        cached user.
+        test_deactivation_rejects_token(): Test that a user deactivated by
+        activity_check is rejected on the next request.
+        test_password_is_not_cached(): Test that the cache holds no
+        password hash.
+        test_password_change_revokes_token(): Test that with
+        CHECK_REVOKE_TOKEN a password change rejects older tokens.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(
+            email='user@test.test',
+            last_login=timezone.now() - timedelta(days=60)
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.url = reverse('users:user-retrieve', args=[self.user.pk])
+
+    def test_user_is_read_once(self):
+        """
+        Test that the second request costs one query less than the first.
+        """
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_update_invalidates(self):
+        """
+        Test that saving the user through UsersUpdateView drops the entry.
+        """
+        self.client.get(self.url)
+        key = USER_KEY.format(user_id=self.user.pk)
+        self.assertIsNotNone(cache.get(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('users:users-update', args=[self.user.pk]),
+                {'first_name': 'Name'}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(cache.get(key))
+
+    def test_deactivation_rejects_token(self):
+        """
+        Test that the sweep drops the cached user, so the still valid token
+        is refused.
+        """
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_200_OK
+        )
+
+        activity_check()
+
+        self.assertEqual(
+            self.client.get(self.url).status_code,
+            status.HTTP_401_UNAUTHORIZED
+        )
+
+    def test_password_is_not_cached(self):
+        """
+        Test that the cached entry and the cached user carry no password.
+        """
+        User.objects.filter(pk=self.user.pk).update(password='secret-hash')
+        self.client.get(self.url)
+
+        values, revoke_hash = cache.get(USER_KEY.format(user_id=self.user.pk))
+        self.assertNotIn('password', values)
+        self.assertIsNone(revoke_hash)
+        self.assertNotIn('secret-hash', repr(values))
+
+    def test_password_change_revokes_token(self):
+        """
+        Test that a token issued before a password change is refused once
+        the password changes, while the user is served from the cache.
+        """
+        with mock.patch.object(api_settings, 'CHECK_REVOKE_TOKEN', True):
+            self.client.credentials(
+                HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+            )
+            self.assertEqual(
+                self.client.get(self.url).status_code, status.HTTP_200_OK
+            )
+            with self.assertNumQueries(2):
+                self.assertEqual(
+                    self.client.get(self.url).status_code, status.HTTP_200_OK
+                )
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.user.set_password('new-password')
+                self.user.save()
+
+            self.assertEqual(
+                self.client.get(self.url).status_code,
+                status.HTTP_401_UNAUTHORIZED
+            )
@@ -1,7 +1,9 @@
+from django.db.models import prefetch_related_objects
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
 
 from users.models import User
+from users.paginators import UsersPaginator
 from users.permissions import IsOwnerOrReadOnly
 from users.serializers import UserSerializer, UserRegistrationSerializer
 
@@ -14,16 +16,42 @@ class UserListView(generics.ListAPIView):
     access to user data.
 
     Attributes:
+        pagination_class (UsersPaginator): The pagination class.
         serializer_class (UserSerializer): The serializer used for user data.
-        queryset (QuerySet): The query set to fetch all users.
+        queryset (QuerySet): The query set to fetch all users, limited to
+        the columns other users may see.
+
+    Methods:
+        paginate_queryset: Override to render the requesting user's own row
+        from 'request.user', with their payments prefetched.
 
     Usage:
         - Use this view to retrieve a list of users in your Django REST
         framework API.
     """
 
+    pagination_class = UsersPaginator
     serializer_class = UserSerializer
-    queryset = User.objects.all()
+    queryset = User.objects.only(
+        'email', 'first_name', 'telephone', 'image', 'country', 'city'
+    )
+
+    def paginate_queryset(self, queryset):
+        """
+        Return the page of users.
+
+        The rows of other users come from the narrow queryset and render
+        without touching their payments. If the requesting user is on the
+        page, their row is replaced by 'request.user', which is fully
+        loaded, and only their payments are fetched, with one query.
+        """
+        page = super().paginate_queryset(queryset)
+        user = self.request.user
+        for index, instance in enumerate(page):
+            if instance.pk == user.pk:
+                prefetch_related_objects([user], 'payment')
+                page[index] = user
+        return page
 
 
 class UserRegistrationView(generics.CreateAPIView):